@@ -1,3 +1,4 @@
+import asyncio
 import socketio
 
 from fastapi import FastAPI, Request
@@ -17,6 +18,14 @@ from app.routes import (
     worklet_iterations,
 )
 from app.socket_handler import sio
+from core.config import settings
+from core.llm.configurations.remote_llm import close_async_clients
+from core.llm.router import run_health_probes
+from core.references.driver_pool import scholar_driver_pool
+from core.parsers.pdf_pages import shutdown_executor as shutdown_parser_pool
+from core.parsers.tesseract_pool import tesseract_engine
+from core.references import github, google_scholar
+from pipeline.tools import extract
 
 fastapi_app = FastAPI()
 
@@ -76,6 +85,29 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
     )
 
 
+@fastapi_app.on_event("startup")
+async def start_health_probes():
+    fastapi_app.state.health_probe_task = asyncio.create_task(run_health_probes())
+    # Scholar is fetched over HTTP first; browsers are started on the first
+    # challenge fallback unless they are explicitly warmed here
+    if settings.SCHOLAR_BROWSER_WARMUP:
+        fastapi_app.state.browser_warmup_task = asyncio.create_task(
+            asyncio.to_thread(scholar_driver_pool.warm)
+        )
+
+
+@fastapi_app.on_event("shutdown")
+async def shutdown_clients():
+    fastapi_app.state.health_probe_task.cancel()
+    await close_async_clients()
+    await github.close_http_client()
+    await google_scholar.close_http_client()
+    await extract.close_http_client()
+    await asyncio.to_thread(scholar_driver_pool.close)
+    shutdown_parser_pool()
+    tesseract_engine.shutdown()
+
+
 fastapi_app.include_router(health.router)
 fastapi_app.include_router(cluster.router)
 fastapi_app.include_router(thread.router)
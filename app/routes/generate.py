@@ -9,6 +9,7 @@ from pipeline.builder import Pipeline
 from core.utils.process_array_string import process_array_string
 from app.broadcast import update_message
 from core.utils.transform_worklet import transform_worklet
+from core.utils.context_cache import clear_thread_context
 
 router = APIRouter(prefix="/generate", tags=["generate"])
 
@@ -83,7 +84,10 @@ async def generate(
     )
 
     start_time = time.time()
-    state = await Pipeline.ainvoke(state)
+    try:
+        state = await Pipeline.ainvoke(state)
+    finally:
+        clear_thread_context(thread_id)
     state = AgentState.model_validate(state)
     end_time = time.time()
     print(f"WORKLET GENERATION COMPLETED: {end_time - start_time:.2f} seconds")
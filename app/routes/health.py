@@ -13,9 +13,54 @@
 
 
 from fastapi import APIRouter
+from core.llm.router import router_stats
+from core.llm.response_cache import cache_stats
+from core.parsers.image import vision_batcher
+from core.parsers.ocr_cache import stats as ocr_cache_stats
+from core.parsers.parse_cache import stats as parse_cache_stats
+from core.parsers.tesseract_pool import tesseract_engine
+from core.parsers.work_pools import pool_stats
+from core.references.driver_pool import scholar_driver_pool
+from core.references.github import github_stats
+from core.references.google_scholar import stats as scholar_stats
+from core.references.reference_cache import cache_stats as reference_cache_stats
+from pipeline.tools.extract import stats as extract_stats
+from pipeline.tools.search import stats as tavily_stats
+
 router = APIRouter(prefix="/health", tags=["health"])
 
 
 @router.get("/")
 async def health_check():
     return {"status": "ok"}
+
+
+@router.get("/llm")
+async def llm_queue_stats():
+    """Health, latency, in-flight and queued requests per GPU LLM backend."""
+    return {"backends": router_stats(), "response_cache": cache_stats()}
+
+
+@router.get("/references")
+async def reference_stats():
+    """Reference cache hit rates, GitHub rate limit, Tavily usage and Scholar fetch paths."""
+    return {
+        "reference_cache": reference_cache_stats(),
+        "github": github_stats(),
+        "tavily": tavily_stats,
+        "tavily_extract": extract_stats,
+        "scholar_fetches": scholar_stats,
+        "scholar_browsers": scholar_driver_pool.stats(),
+    }
+
+
+@router.get("/parsers")
+async def parser_stats():
+    """Usage of the shared parsing pools, OCR engines and parse caches."""
+    return {
+        "pools": pool_stats(),
+        "parse_cache": parse_cache_stats,
+        "ocr_cache": ocr_cache_stats,
+        "vision_batches": vision_batcher.stats(),
+        "tesseract": tesseract_engine.stats(),
+    }
@@ -18,6 +18,62 @@ class Settings(BaseSettings):
     REMOTE_GPU: bool = False
     VISION_URL: str
     USE_VISION_MODEL: bool = False
+    # Remote GPU LLM connection pool
+    REMOTE_LLM_MAX_CONNECTIONS: int = 16
+    REMOTE_LLM_MAX_KEEPALIVE: int = 8
+    REMOTE_LLM_KEEPALIVE_EXPIRY: float = 120.0
+    REMOTE_LLM_TIMEOUT: float = 200.0
+    REMOTE_LLM_CONNECT_TIMEOUT: float = 10.0
+    # Max concurrent requests per (model, port), match OLLAMA_NUM_PARALLEL
+    OLLAMA_NUM_PARALLEL: int = 1
+    # Comma-separated host:port GPU LLM endpoints, defaults to constants.LLM_ENDPOINTS
+    LLM_ENDPOINTS: str = ""
+    # LLM response cache: "none", "disk" or "mongo"
+    LLM_CACHE_BACKEND: str = "none"
+    LLM_CACHE_DIR: str = "data/llm_cache"
+    LLM_CACHE_TTL: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 5000
+    # Google Scholar headless Chrome pool
+    SCHOLAR_BROWSER_POOL_SIZE: int = 2
+    SCHOLAR_BROWSER_MAX_PAGES: int = 25
+    SCHOLAR_BROWSER_WARMUP: bool = False  # Start browsers on boot, not on first fallback
+    # Optional GitHub token, raises the search API rate limit
+    GITHUB_TOKEN: str = ""
+    # Worker processes for PyMuPDF parsing, 0 uses one per CPU
+    PARSER_PROCESSES: int = 0
+    # Resolution text-less (scanned) PDF pages are rendered at for OCR
+    PDF_RENDER_DPI: int = 200
+    # Parsing pools shared by all threads, 0 derives the size from the CPU count
+    PARSER_MAX_FILES: int = 0
+    OCR_WORKERS: int = 0
+    VISION_MAX_IN_FLIGHT: int = 1
+    # Local vision model: images per request and how long to wait to fill a batch
+    VISION_BATCH_SIZE: int = 4
+    VISION_BATCH_WINDOW: float = 0.25
+    # Downscale/grayscale/recompress images before OCR, cached by content hash
+    NORMALIZE_IMAGES: bool = True
+    NORMALIZED_IMAGE_DIR: str = "data/normalized_images"
+    VISION_MAX_DIMENSION: int = 1024
+    TESSERACT_MAX_DIMENSION: int = 2048
+    # Tesseract worker processes (sized by OCR_WORKERS) and their batching
+    TESSERACT_LANG: str = "eng"
+    TESSERACT_PSM: int = 3
+    TESSERACT_CMD: str = ""  # Path to the binary when it is not on PATH
+    TESSERACT_BATCH_SIZE: int = 8
+    TESSERACT_BATCH_WINDOW: float = 0.05
+    # Parsed documents keyed by file SHA-256 and parser version
+    PARSE_CACHE_ENABLED: bool = True
+    PARSE_CACHE_DIR: str = "data/parse_cache"
+    # Documents with an image whose OCR came back empty or failed are only kept this long
+    PARSE_CACHE_INCOMPLETE_TTL: int = 3600
+    # Image OCR results keyed by the SHA-256 of the image bytes
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_DIR: str = "data/ocr_cache"
+    # Reference lookup cache: "none", "sqlite" or "mongo"
+    REFERENCE_CACHE_BACKEND: str = "none"
+    REFERENCE_CACHE_PATH: str = "data/reference_cache.sqlite3"
+    REFERENCE_CACHE_TTL: int = 24 * 3600  # served fresh
+    REFERENCE_CACHE_STALE_TTL: int = 7 * 24 * 3600  # served stale while refreshing
 
     class Config:
         env_file = ".env"
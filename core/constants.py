@@ -6,6 +6,8 @@ SWITCHES = {
     "EXTRACT_KEYWORDS_DOMAINS": True,  # Whether to extract keywords and domains from input
     "GENERATE_KEYWORD": True,  # Whether to generate appropriate keywords for reference search(uses worklet title as default otherwise)
     "RANK_REFERENCES": True,  # Whether to rank references based on relevance
+    "STREAM_WORKLET_PIPELINE": True,  # Start references/ranking for each worklet as soon as it is streamed, files once it is kept
+    "SHARD_WORKLET_GENERATION": True,  # Split worklet generation into concurrent sub-requests spread over the GPU backends
     "FALLBACK_TO_GEMINI": True,  # Fallback to Gemini if Ollama fails
     "FALLBACK_TO_OPENAI": False,  # Fallback to OpenAI if BOTH Ollama and Gemini fails
     "REMOTE_GPU": settings.REMOTE_GPU,  # Use remote GPU LLMs
@@ -14,17 +16,21 @@ SWITCHES = {
 
 PORT1 = 11434  # port where ollama is running
 PORT2 = 11435  # port where second ollama instance is running
+# Default GPU LLM endpoint pool, override with LLM_ENDPOINTS="host:port,host:port" in .env
+LLM_ENDPOINTS = [("localhost", PORT1), ("localhost", PORT2)]
 
 GPU_MODEL = "gpt-oss:20b-50k-8k"
 MAX_TOKENS = 50000
+# Worklets requested per sub-request when SWITCHES["SHARD_WORKLET_GENERATION"] is on,
+# keeps each structured response well below the model's 8k output limit
+WORKLETS_PER_SHARD = 5
 
 # GPU LLM configurations
+# The port is only a preference, core.llm.router picks the least-loaded endpoint per call
 KEYWORD_DOMAIN_EXTRACTION_LLM = GPULLMConfig(model=GPU_MODEL, port=PORT2)
 WORKLET_GENERATOR_LLM = GPULLMConfig(model=GPU_MODEL, port=PORT2)
 REFERENCE_KEYWORD_LLM = GPULLMConfig(model=GPU_MODEL, port=PORT2)
-REFERENCE_KEYWORD_LLM2 = GPULLMConfig(model=GPU_MODEL, port=PORT1)
 REFERENCE_RANKING_LLM = GPULLMConfig(model=GPU_MODEL, port=PORT2)
-REFERENCE_RANKING_LLM2 = GPULLMConfig(model=GPU_MODEL, port=PORT1)
 
 IMAGE_PARSER_LLM = "gemma3:12b"
 # Fallback LLM models
@@ -1,10 +1,20 @@
 import asyncio
+import re
 import time
+from typing import AsyncIterator, Optional
 from core.config import settings
 from google import genai
 from openai import AsyncOpenAI
 from langchain_core.output_parsers import PydanticOutputParser
 from core.constants import SWITCHES, FALLBACK_OPENAI_MODEL, FALLBACK_GEMINI_MODEL
+from core.llm.router import Backend, pick_backend
+from core.llm.streaming import JsonStreamHandler
+from core.llm.response_cache import (
+    cache_enabled,
+    cache_key,
+    get_cached_response,
+    store_response,
+)
 
 if SWITCHES["REMOTE_GPU"]:
     import core.llm.configurations.remote_llm as llm_module
@@ -13,6 +23,56 @@ else:
 
 MyServerLLM = llm_module.MyServerLLM
 
+GPU_BACKEND_TRIES = 2  # GPU backends tried per attempt before falling back
+
+_server_llms = {}
+
+
+def get_server_llm(model: str, port: int, host: str = "localhost") -> MyServerLLM:
+    """Return a shared MyServerLLM instance for the given model/host/port."""
+    key = (model, host, port)
+    if key not in _server_llms:
+        _server_llms[key] = MyServerLLM(model=model, port=port, host=host)
+    return _server_llms[key]
+
+
+async def consume_stream(
+    chunks: AsyncIterator[str], stream_handler: JsonStreamHandler
+) -> str:
+    """Forward streamed chunks to the handler and return the joined text."""
+    await stream_handler.start()
+    parts = []
+    async for chunk in chunks:
+        parts.append(chunk)
+        await stream_handler.on_chunk(chunk)
+    await stream_handler.finish()
+    return re.sub(r"<think>.*?</think>", "", "".join(parts), flags=re.DOTALL)
+
+
+async def call_backend(
+    backend: Backend,
+    prompt: str,
+    thread_id: str | None = None,
+    stream_handler: Optional[JsonStreamHandler] = None,
+) -> str:
+    """Call a GPU backend once its scheduler slot is free, recording the outcome."""
+    gpu_llm = get_server_llm(backend.model, backend.port, backend.host)
+    async with backend.scheduler.slot(thread_id):
+        s = time.time()
+        try:
+            if stream_handler is None:
+                output = await gpu_llm._acall(prompt)
+            else:
+                output = await consume_stream(
+                    gpu_llm.astream_text(prompt), stream_handler
+                )
+        except Exception:
+            backend.record_failure()
+            raise
+        backend.record_success(time.time() - s)
+        return output
+
+
 API_KEYS = [
     settings.API_KEY_1,
     settings.API_KEY_2,
@@ -27,19 +87,49 @@ MAX_RETRIES = 8  # Total attempts across all LLMs
 count = 0
 
 
+async def _single_chunk(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+async def _gemini_chunks(client, prompt: str, config) -> AsyncIterator[str]:
+    async for chunk in await client.aio.models.generate_content_stream(
+        model=FALLBACK_GEMINI_MODEL, contents=prompt, config=config
+    ):
+        if chunk.text:
+            yield chunk.text
+
+
+async def _openai_chunks(prompt: str) -> AsyncIterator[str]:
+    stream = await openai_client.chat.completions.create(
+        model=FALLBACK_OPENAI_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.2,
+        stream=True,
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
 async def invoke_llm(
     gpu_model,
     response_schema,
     contents,
     port=11434,
     remove_thinking=False,
+    thread_id=None,
+    use_cache=True,
+    stream_handler: Optional[JsonStreamHandler] = None,
 ):
     """
     Unified structured LLM invocation with retries and fallbacks:
-    - GPU server
+    - Response cache (if LLM_CACHE_BACKEND is configured and use_cache is set)
+    - GPU server (least-loaded backend, `port` is only a preference)
     - Gemini API
     - OpenAI API
     Each returns parsed structured data using the same logic.
+    With a stream_handler, every backend is called in streaming mode and the
+    handler receives the chunks as they arrive.
     """
     global count
 
@@ -54,36 +144,48 @@ async def invoke_llm(
     {contents}
     """
 
+    key = None
+    if use_cache and cache_enabled():
+        key = cache_key(gpu_model, response_schema, prompt)
+        cached_output = await get_cached_response(key)
+        if cached_output is not None:
+            try:
+                structured = parser.parse(cached_output)
+                print("Success via LLM response cache")
+                if stream_handler is not None:
+                    await consume_stream(_single_chunk(cached_output), stream_handler)
+                return structured
+            except Exception as e:
+                print(f"Cached LLM response could not be parsed, ignoring it: {e}")
+
+    async def remember(raw_output: str) -> None:
+        if key is not None:
+            await store_response(key, raw_output)
+
     for attempt in range(1, MAX_RETRIES + 1):
         print(f"\n=== Attempt {attempt}/{MAX_RETRIES} ===")
 
         # === 1. GPU SERVER ===
         if gpu_model:
-            try:
-                print("Trying GPU server...")
-                gpu_llm = MyServerLLM(model=gpu_model, port=port)
-                s = time.time()
-                llm_output = await asyncio.to_thread(gpu_llm._call, prompt)
-                e = time.time()
-                print(f"Success via GPU server, LLM call took {e - s:.2f}s")
-                structured = parser.parse(llm_output)
-                return structured
-            except Exception as e:
-                print(f"GPU server failed failed at port {port}: {e}")
-
-            if port == 11435:
-                temp_port = 11434
+            tried = []
+            for _ in range(GPU_BACKEND_TRIES):
+                backend = pick_backend(gpu_model, preferred_port=port, exclude=tried)
+                if backend is None:
+                    break
+                tried.append(backend)
                 try:
-                    print(f"Retrying GPU server on alternate port {temp_port}...")
-                    gpu_llm = MyServerLLM(model=gpu_model, port=temp_port)
+                    print(f"Trying GPU server {backend.name}...")
                     s = time.time()
-                    llm_output = await asyncio.to_thread(gpu_llm._call, prompt)
+                    llm_output = await call_backend(
+                        backend, prompt, thread_id, stream_handler
+                    )
                     e = time.time()
                     print(f"Success via GPU server, LLM call took {e - s:.2f}s")
                     structured = parser.parse(llm_output)
+                    await remember(llm_output)
                     return structured
                 except Exception as e:
-                    print(f"GPU server failed at alternate port {temp_port}: {e}")
+                    print(f"GPU server failed at {backend.name}: {e}")
 
         # === 2. GEMINI FALLBACK ===
         if SWITCHES["FALLBACK_TO_GEMINI"]:
@@ -107,26 +209,35 @@ async def invoke_llm(
                             thinking_budget=0
                         )
 
-                    response = await asyncio.wait_for(
-                        asyncio.to_thread(
-                            client.models.generate_content,
-                            model=FALLBACK_GEMINI_MODEL,
-                            contents=prompt,
-                            config=config,
-                        ),
-                        timeout=80,
-                    )
+                    if stream_handler is not None:
+                        raw_output = await asyncio.wait_for(
+                            consume_stream(
+                                _gemini_chunks(client, prompt, config), stream_handler
+                            ),
+                            timeout=80,
+                        )
+                    else:
+                        response = await asyncio.wait_for(
+                            asyncio.to_thread(
+                                client.models.generate_content,
+                                model=FALLBACK_GEMINI_MODEL,
+                                contents=prompt,
+                                config=config,
+                            ),
+                            timeout=80,
+                        )
 
-                    # Try to extract the raw text content
-                    raw_output = None
-                    try:
-                        raw_output = response.text or str(response)
-                    except Exception:
-                        raw_output = str(response)
+                        # Try to extract the raw text content
+                        raw_output = None
+                        try:
+                            raw_output = response.text or str(response)
+                        except Exception:
+                            raw_output = str(response)
 
                     structured = parser.parse(raw_output)
                     e = time.time()
                     print(f"Success via Gemini, LLM call took {e - s:.2f}s")
+                    await remember(raw_output)
                     return structured
 
                 except asyncio.TimeoutError:
@@ -140,16 +251,22 @@ async def invoke_llm(
             try:
                 print("Falling back to OpenAI...")
                 s = time.time()
-                response = await openai_client.chat.completions.create(
-                    model=FALLBACK_OPENAI_MODEL,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.2,
-                )
+                if stream_handler is not None:
+                    raw_output = await consume_stream(
+                        _openai_chunks(prompt), stream_handler
+                    )
+                else:
+                    response = await openai_client.chat.completions.create(
+                        model=FALLBACK_OPENAI_MODEL,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=0.2,
+                    )
 
-                raw_output = response.choices[0].message.content
+                    raw_output = response.choices[0].message.content
                 structured = parser.parse(raw_output)
                 e = time.time()
                 print(f"Success via OpenAI, LLM call took {e - s:.2f}s")
+                await remember(raw_output)
                 return structured
 
             except Exception as e:
@@ -1,11 +1,53 @@
 import requests
+import httpx
 from langchain_core.language_models import LLM
-from typing import Optional, List
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
 import re
 from core.config import settings
 
 QUERY_URL = settings.QUERY_URL
 
+# Shared keep-alive clients per (QUERY_URL, model, port)
+_async_clients: Dict[Tuple[str, str, int], httpx.AsyncClient] = {}
+
+
+def get_async_client(model: str, port: int) -> httpx.AsyncClient:
+    """Return the pooled async HTTP client for the given model/port pair."""
+    key = (QUERY_URL, model, port)
+    client = _async_clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.REMOTE_LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.REMOTE_LLM_MAX_KEEPALIVE,
+                keepalive_expiry=settings.REMOTE_LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                settings.REMOTE_LLM_TIMEOUT,
+                connect=settings.REMOTE_LLM_CONNECT_TIMEOUT,
+            ),
+        )
+        _async_clients[key] = client
+    return client
+
+
+async def close_async_clients() -> None:
+    """Close every pooled client, used on application shutdown."""
+    clients = list(_async_clients.values())
+    _async_clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def _clean_response(data: dict) -> str:
+    return re.sub(
+        r"<think>.*?</think>",
+        "",
+        data.get("response", ""),
+        flags=re.DOTALL,
+        # r"<think>.*?</think>", "", data.get("content", ""), flags=re.DOTALL
+    )
+
 
 class MyServerLLM(LLM):
     """
@@ -14,12 +56,19 @@ class MyServerLLM(LLM):
     """
 
     model: str
+    port: int
     url: str
 
-    def __init__(self, model: str, port: int = 11434, **kwargs):
+    def __init__(
+        self, model: str, port: int = 11434, host: str = "localhost", **kwargs
+    ):
+        # The remote gateway at QUERY_URL routes by port, host is not used
         print(f"Initializing MyServerLLM with model={model} at port={port}")
         super().__init__(
-            model=model, url=f"{QUERY_URL}?model={model}&port={port}", **kwargs
+            model=model,
+            port=port,
+            url=f"{QUERY_URL}?model={model}&port={port}",
+            **kwargs,
         )
 
     @property
@@ -34,18 +83,38 @@ class MyServerLLM(LLM):
             response = requests.post(
                 self.url,
                 json={"prompt": prompt},
-                timeout=200,
+                timeout=settings.REMOTE_LLM_TIMEOUT,
             )
             response.raise_for_status()
             data = response.json()
             print(data)
-            cleaned_text = re.sub(
-                r"<think>.*?</think>",
-                "",
-                data.get("response", ""),
-                flags=re.DOTALL,
-                # r"<think>.*?</think>", "", data.get("content", ""), flags=re.DOTALL
-            )
-            return cleaned_text
+            return _clean_response(data)
         except requests.exceptions.RequestException as e:
             raise RuntimeError(f"Failed to call GPU LLM server: {e}") from e
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> str:
+        """
+        Asynchronously call the GPU LLM endpoint over the pooled keep-alive client.
+        """
+        client = get_async_client(self.model, self.port)
+        try:
+            response = await client.post(self.url, json={"prompt": prompt})
+            response.raise_for_status()
+            data = response.json()
+            print(data)
+            return _clean_response(data)
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Failed to call GPU LLM server: {e}") from e
+
+    async def astream_text(self, prompt: str) -> AsyncIterator[str]:
+        """
+        The remote gateway only returns complete responses, so the whole
+        cleaned response is yielded as a single chunk.
+        """
+        yield await self._acall(prompt)
@@ -2,3 +2,12 @@ def image_parsing_prompt() -> str:
     return (
         "Extract all possible text and information from the image including any charts, tables, graphs, trends, diagrams and visual descriptions. Don't make up any information. Only output the extracted information without any imagination."
     )
+
+
+def batch_image_parsing_prompt(count: int) -> str:
+    return (
+        f"You are given {count} images. For each image separately, "
+        + image_parsing_prompt()
+        + ' Respond with JSON only, in the form {"images": [{"index": 1, "text": "<extracted information>"}, ...]}, '
+        f"with exactly one entry per image in the order the images were given (index 1 to {count})."
+    )
@@ -6,8 +6,13 @@ def worklet_generation_prompt(
     keywords: list[str],
     domains: list[str],
     count: int,
+    seed_themes: list[str] | None = None,
 ):
-    """Prompt that focuses purely on generating worklets using the collected context."""
+    """
+    Prompt that focuses purely on generating worklets using the collected context.
+    When seed_themes is given, the request is one shard of a larger generation and
+    the worklets are steered towards those themes so shards do not overlap.
+    """
 
     contents = []
 
@@ -101,4 +106,16 @@ def worklet_generation_prompt(
         }
     )
 
+    if seed_themes:
+        contents.append(
+            {
+                "role": "user",
+                "parts": (
+                    f"Center these {count} worklets on the following themes: {seed_themes}. "
+                    "Other themes are covered by separate requests, so every worklet in this batch must be "
+                    "clearly anchored in at least one of the listed themes."
+                ),
+            }
+        )
+
     return contents
@@ -0,0 +1,198 @@
+"""
+Content-addressed cache of raw LLM responses.
+
+Entries are keyed on a hash of (model, response schema, prompt) and hold the
+raw text returned by the LLM, before PydanticOutputParser.parse. The backend
+is chosen with LLM_CACHE_BACKEND ("none", "disk" or "mongo"); entries expire
+after LLM_CACHE_TTL seconds and the least recently used ones are evicted once
+LLM_CACHE_MAX_ENTRIES is exceeded.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from core.config import settings
+
+
+def cache_key(model: Optional[str], response_schema, prompt: str) -> str:
+    payload = json.dumps(
+        {
+            "model": model or "",
+            "schema": response_schema.model_json_schema(),
+            "prompt": prompt,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskResponseCache:
+    """
+    One JSON file per entry; file mtime tracks last use for LRU eviction.
+
+    The directory is scanned once on start. After that the LRU order is kept
+    in memory, so a put only removes the entries past max_entries instead of
+    listing and stat-ing the whole directory.
+    """
+
+    def __init__(self, directory: str, ttl: int, max_entries: int):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index: "OrderedDict[str, None]" = self._scan()
+
+    def _scan(self) -> "OrderedDict[str, None]":
+        entries = [
+            entry
+            for entry in os.scandir(self.directory)
+            if entry.is_file() and entry.name.endswith(".json")
+        ]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        return OrderedDict((entry.name[: -len(".json")], None) for entry in entries)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self._index.pop(key, None)
+            return None
+        if time.time() - entry.get("created_at", 0) > self.ttl:
+            with self._lock:
+                self._index.pop(key, None)
+            self._remove(path)
+            return None
+        os.utime(path)
+        with self._lock:
+            self._index[key] = None
+            self._index.move_to_end(key)
+        return entry.get("text")
+
+    def put(self, key: str, text: str) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "text": text}, f)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._index[key] = None
+            self._index.move_to_end(key)
+            overflow = len(self._index) - self.max_entries
+            stale = [self._index.popitem(last=False)[0] for _ in range(max(0, overflow))]
+        for stale_key in stale:
+            self._remove(self._path(stale_key))
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class MongoResponseCache:
+    """Entries in the `llm_cache` collection, expired by a TTL index."""
+
+    def __init__(self, ttl: int, max_entries: int):
+        from core.database import db
+
+        self.collection = db.llm_cache
+        self.ttl = ttl
+        self.max_entries = max_entries
+        try:
+            self.collection.create_index("created_at", expireAfterSeconds=ttl)
+            self.collection.create_index("last_used_at")
+        except Exception as exc:
+            print(f"Warning: failed creating indexes on 'llm_cache': {exc}")
+
+    def get(self, key: str) -> Optional[str]:
+        now = datetime.now()
+        entry = self.collection.find_one_and_update(
+            {"_id": key, "created_at": {"$gte": now - timedelta(seconds=self.ttl)}},
+            {"$set": {"last_used_at": now}},
+        )
+        return entry.get("text") if entry else None
+
+    def put(self, key: str, text: str) -> None:
+        now = datetime.now()
+        self.collection.replace_one(
+            {"_id": key},
+            {"text": text, "created_at": now, "last_used_at": now},
+            upsert=True,
+        )
+        overflow = self.collection.estimated_document_count() - self.max_entries
+        if overflow > 0:
+            stale = self.collection.find({}, {"_id": 1}).sort("last_used_at", 1)
+            ids = [doc["_id"] for doc in stale.limit(overflow)]
+            self.collection.delete_many({"_id": {"$in": ids}})
+
+
+def _build_cache():
+    backend = (settings.LLM_CACHE_BACKEND or "none").lower()
+    if backend == "disk":
+        return DiskResponseCache(
+            settings.LLM_CACHE_DIR,
+            settings.LLM_CACHE_TTL,
+            settings.LLM_CACHE_MAX_ENTRIES,
+        )
+    if backend == "mongo":
+        return MongoResponseCache(
+            settings.LLM_CACHE_TTL, settings.LLM_CACHE_MAX_ENTRIES
+        )
+    return None
+
+
+_cache = _build_cache()
+hits = 0
+misses = 0
+
+
+def cache_enabled() -> bool:
+    return _cache is not None
+
+
+async def get_cached_response(key: str) -> Optional[str]:
+    global hits, misses
+    if _cache is None:
+        return None
+    try:
+        text = await asyncio.to_thread(_cache.get, key)
+    except Exception as e:
+        print(f"[llm-cache] lookup failed: {e}")
+        return None
+    if text is None:
+        misses += 1
+    else:
+        hits += 1
+    return text
+
+
+async def store_response(key: str, text: str) -> None:
+    if _cache is None:
+        return
+    try:
+        await asyncio.to_thread(_cache.put, key, text)
+    except Exception as e:
+        print(f"[llm-cache] store failed: {e}")
+
+
+def cache_stats() -> dict:
+    return {
+        "backend": settings.LLM_CACHE_BACKEND,
+        "hits": hits,
+        "misses": misses,
+    }
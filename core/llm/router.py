@@ -0,0 +1,172 @@
+"""
+Least-loaded router over the pool of GPU LLM endpoints.
+
+Endpoints come from settings.LLM_ENDPOINTS ("host:port,host:port,...") and
+default to the two local Ollama instances in core.constants. Every call is
+routed to the healthy backend with the fewest outstanding requests per slot,
+breaking ties on EWMA latency. Backends that keep failing are benched for a
+cool-down period; local Ollama backends are also probed in the background.
+"""
+
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from core.config import settings
+from core.constants import LLM_ENDPOINTS, SWITCHES
+from core.llm.scheduler import BackendScheduler, get_scheduler
+
+EWMA_ALPHA = 0.3  # Weight of the newest latency sample
+FAILURE_THRESHOLD = 2  # Consecutive failures before a backend is benched
+COOLDOWN_SECONDS = 30.0
+PROBE_INTERVAL_SECONDS = 15.0
+PROBE_TIMEOUT_SECONDS = 5.0
+
+
+def _parse_endpoints(raw: str) -> List[Tuple[str, int]]:
+    endpoints = []
+    for entry in raw.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.rpartition(":")
+        endpoints.append((host or "localhost", int(port)))
+    return endpoints
+
+
+ENDPOINTS: List[Tuple[str, int]] = (
+    _parse_endpoints(settings.LLM_ENDPOINTS) or LLM_ENDPOINTS
+)
+
+
+class Backend:
+    """One (model, host, port) endpoint with health and latency tracking."""
+
+    def __init__(self, model: str, host: str, port: int):
+        self.model = model
+        self.host = host
+        self.port = port
+        self.ewma_latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.benched_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.model}@{self.host}:{self.port}"
+
+    @property
+    def scheduler(self) -> BackendScheduler:
+        return get_scheduler(self.model, self.port, self.host)
+
+    def available(self, now: float) -> bool:
+        return now >= self.benched_until
+
+    def score(self, preferred_port: Optional[int]) -> tuple:
+        scheduler = self.scheduler
+        return (
+            scheduler.load / scheduler.max_in_flight,
+            self.ewma_latency or 0.0,
+            0 if self.port == preferred_port else 1,
+        )
+
+    def record_success(self, latency: float) -> None:
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.benched_until = 0.0
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency
+            )
+
+    def record_failure(self) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= FAILURE_THRESHOLD:
+            self.bench()
+
+    def bench(self) -> None:
+        self.benched_until = time.time() + COOLDOWN_SECONDS
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "available": self.available(time.time()),
+            "ewma_latency_seconds": (
+                round(self.ewma_latency, 3) if self.ewma_latency is not None else None
+            ),
+            "requests": self.requests,
+            "failures": self.failures,
+            **self.scheduler.stats(),
+        }
+
+
+_backends: Dict[Tuple[str, str, int], Backend] = {}
+
+
+def get_backends(model: str) -> List[Backend]:
+    """Return the backends serving the given model, registering them on first use."""
+    backends = []
+    for host, port in ENDPOINTS:
+        key = (model, host, port)
+        if key not in _backends:
+            _backends[key] = Backend(model, host, port)
+        backends.append(_backends[key])
+    return backends
+
+
+def pick_backend(
+    model: str,
+    preferred_port: Optional[int] = None,
+    exclude: Iterable[Backend] = (),
+) -> Optional[Backend]:
+    """
+    Pick the least-loaded available backend for the model. If every backend
+    is benched, the least-loaded one is still returned so calls are not dropped.
+    """
+    excluded = set(id(b) for b in exclude)
+    candidates = [b for b in get_backends(model) if id(b) not in excluded]
+    if not candidates:
+        return None
+    now = time.time()
+    available = [b for b in candidates if b.available(now)] or candidates
+    return min(available, key=lambda b: b.score(preferred_port))
+
+
+async def probe_backend(backend: Backend, client: httpx.AsyncClient) -> None:
+    try:
+        response = await client.get(
+            f"http://{backend.host}:{backend.port}/api/tags",
+            timeout=PROBE_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        if not backend.available(time.time()):
+            print(f"[router] {backend.name} is healthy again")
+        backend.benched_until = 0.0
+        backend.consecutive_failures = 0
+    except Exception as e:
+        if backend.available(time.time()):
+            print(f"[router] Health probe failed for {backend.name}: {e}")
+        backend.bench()
+
+
+async def run_health_probes(interval: float = PROBE_INTERVAL_SECONDS) -> None:
+    """Periodically probe local Ollama backends; remote backends rely on call outcomes."""
+    if SWITCHES["REMOTE_GPU"]:
+        return
+    async with httpx.AsyncClient() as client:
+        while True:
+            await asyncio.gather(
+                *(probe_backend(b, client) for b in list(_backends.values()))
+            )
+            await asyncio.sleep(interval)
+
+
+def router_stats() -> List[dict]:
+    return [backend.stats() for backend in _backends.values()]
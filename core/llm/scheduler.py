@@ -0,0 +1,131 @@
+"""
+Asyncio-native request scheduler for GPU LLM backends.
+
+Each (model, port) backend admits up to `max_in_flight` concurrent requests
+(match it to Ollama's OLLAMA_NUM_PARALLEL). Waiting requests are queued per
+thread and released round-robin across threads, so a thread that fans out
+many calls cannot starve another thread's single call.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+from core.config import settings
+
+DEFAULT_QUEUE = "default"
+
+
+class BackendScheduler:
+    """Bounded, thread-fair admission control for one (model, port) backend."""
+
+    def __init__(
+        self, model: str, port: int, max_in_flight: int = 1, host: str = "localhost"
+    ):
+        self.model = model
+        self.port = port
+        self.host = host
+        self.max_in_flight = max(1, max_in_flight)
+        self.in_flight = 0
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_queue_depth = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    @property
+    def load(self) -> int:
+        """Outstanding requests: running plus waiting."""
+        return self.in_flight + self.queued
+
+    async def acquire(self, queue_id: Optional[str] = None) -> None:
+        if self.in_flight < self.max_in_flight and not self._queues:
+            self.in_flight += 1
+            return
+
+        queue_id = queue_id or DEFAULT_QUEUE
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(queue_id, deque()).append(waiter)
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just before cancellation, pass it on
+                self.release()
+            else:
+                self._discard(queue_id, waiter)
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake_next()
+
+    def _discard(self, queue_id: str, waiter: asyncio.Future) -> None:
+        queue = self._queues.get(queue_id)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[queue_id]
+
+    def _wake_next(self) -> None:
+        while self._queues and self.in_flight < self.max_in_flight:
+            # Round-robin: take the head of the oldest thread queue, then move
+            # that thread to the back.
+            queue_id, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(queue_id)
+            else:
+                del self._queues[queue_id]
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, queue_id: Optional[str] = None):
+        start = time.time()
+        await self.acquire(queue_id)
+        self.total_wait += time.time() - start
+        try:
+            yield
+        finally:
+            self.completed += 1
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model,
+            "host": self.host,
+            "port": self.port,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "queued_by_thread": {k: len(q) for k, q in self._queues.items()},
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "avg_wait_seconds": (
+                round(self.total_wait / self.completed, 3) if self.completed else 0.0
+            ),
+        }
+
+
+_schedulers: Dict[Tuple[str, str, int], BackendScheduler] = {}
+
+
+def get_scheduler(model: str, port: int, host: str = "localhost") -> BackendScheduler:
+    """Return the shared scheduler for the given model/host/port."""
+    key = (model, host, port)
+    scheduler = _schedulers.get(key)
+    if scheduler is None:
+        scheduler = BackendScheduler(
+            model, port, max_in_flight=settings.OLLAMA_NUM_PARALLEL, host=host
+        )
+        _schedulers[key] = scheduler
+    return scheduler
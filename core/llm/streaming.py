@@ -0,0 +1,151 @@
+"""
+Streaming support for structured LLM output.
+
+invoke_llm forwards every streamed chunk to a JsonStreamHandler, which relays
+batched tokens to a socket topic and emits each object of the response's JSON
+array (e.g. each worklet of WorkletGenerationResult) as soon as it closes.
+"""
+
+import json
+import time
+from typing import Awaitable, Callable, List, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+from app.socket_handler import sio
+
+TOKEN_FLUSH_SECONDS = 0.25  # Batch streamed tokens into one socket message
+
+
+class JsonArrayItemScanner:
+    """
+    Incrementally finds complete objects inside the array of a top-level JSON
+    object, e.g. each item of {"worklets": [{...}, {...}]}. Text before the
+    first brace (code fences, preambles) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.item_start: Optional[int] = None
+
+    def feed(self, text: str) -> List[str]:
+        self.buffer += text
+        items = []
+        while self.pos < len(self.buffer):
+            ch = self.buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"' and self.stack:
+                self.in_string = True
+            elif ch in "{[":
+                if ch == "{" and self.stack == ["{", "["]:
+                    self.item_start = self.pos
+                self.stack.append(ch)
+            elif ch in "}]" and self.stack:
+                self.stack.pop()
+                if (
+                    ch == "}"
+                    and self.stack == ["{", "["]
+                    and self.item_start is not None
+                ):
+                    items.append(self.buffer[self.item_start : self.pos + 1])
+                    self.item_start = None
+            self.pos += 1
+        return items
+
+
+class JsonStreamHandler:
+    """
+    Receives streamed LLM text for one invoke_llm call. Tokens are emitted to
+    `topic` in batches, and every array item that validates against
+    `item_schema` is kept in `items`, emitted, and passed to `on_item`.
+    Concurrent calls sharing a topic are told apart by `stream_id`, which is
+    added to every message when set.
+    """
+
+    def __init__(
+        self,
+        topic: str,
+        item_schema: Type[BaseModel],
+        on_item: Optional[Callable[[BaseModel, int], Awaitable[None]]] = None,
+        stream_id: Optional[int] = None,
+    ):
+        self.topic = topic
+        self.item_schema = item_schema
+        self.on_item = on_item
+        self.stream_id = stream_id
+        self._reset()
+
+    def _reset(self) -> None:
+        self.scanner = JsonArrayItemScanner()
+        self.items: List[BaseModel] = []
+        self.thinking = False
+        self.pending_tokens = ""
+        self.last_flush = time.time()
+
+    async def start(self) -> None:
+        """Called before every attempt; clients drop anything streamed so far."""
+        self._reset()
+        await self._emit({"type": "reset"})
+
+    async def on_chunk(self, text: str) -> None:
+        if not text:
+            return
+        self.pending_tokens += text
+        if time.time() - self.last_flush >= TOKEN_FLUSH_SECONDS:
+            await self._flush_tokens()
+
+        for raw_item in self.scanner.feed(self._visible(text)):
+            try:
+                item = self.item_schema.model_validate(json.loads(raw_item))
+            except (ValueError, ValidationError) as e:
+                print(f"[stream] Skipping unparsable streamed item: {e}")
+                continue
+            index = len(self.items)
+            self.items.append(item)
+            await self._emit({"type": "item", "index": index, "item": item.model_dump()})
+            if self.on_item:
+                await self.on_item(item, index)
+
+    async def finish(self) -> None:
+        await self._flush_tokens()
+        await self._emit({"type": "done", "count": len(self.items)})
+
+    def _visible(self, text: str) -> str:
+        """Drop <think>...</think> spans so braces in reasoning are not scanned."""
+        visible = ""
+        while text:
+            if self.thinking:
+                end = text.find("</think>")
+                if end == -1:
+                    return visible
+                self.thinking = False
+                text = text[end + len("</think>") :]
+            else:
+                start = text.find("<think>")
+                if start == -1:
+                    return visible + text
+                visible += text[:start]
+                self.thinking = True
+                text = text[start + len("<think>") :]
+        return visible
+
+    async def _emit(self, payload: dict) -> None:
+        if self.stream_id is not None:
+            payload["stream"] = self.stream_id
+        await sio.emit(self.topic, payload)
+
+    async def _flush_tokens(self) -> None:
+        if self.pending_tokens:
+            await self._emit({"type": "tokens", "text": self.pending_tokens})
+            self.pending_tokens = ""
+        self.last_flush = time.time()
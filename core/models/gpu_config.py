@@ -4,3 +4,4 @@ from pydantic import BaseModel
 class GPULLMConfig(BaseModel):
     model: str
     port: int
+    host: str = "localhost"
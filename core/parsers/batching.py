@@ -0,0 +1,61 @@
+"""
+Window-based micro-batching for OCR backends.
+
+Jobs submitted within `window` seconds of each other are grouped, up to
+`max_batch` per group (or a smaller size from `_batch_size`), and handed to
+`_run` as one batch. `_run` returns one result per job.
+"""
+
+import abc
+import asyncio
+from typing import Any, List, Optional, Tuple
+
+
+class WindowBatcher(abc.ABC):
+    def __init__(self, max_batch: int, window: float):
+        self.max_batch = max(1, max_batch)
+        self.window = window
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def submit(self, job: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((job, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+        return await future
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        size = self._batch_size(len(self._pending))
+        while self._pending:
+            batch = self._pending[:size]
+            self._pending = self._pending[size:]
+            asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        results: List[Any] = [None] * len(batch)
+        try:
+            results = await self._run([job for job, _ in batch])
+        except Exception as e:
+            print(f"[{type(self).__name__}] Batch failed: {e}")
+        finally:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _batch_size(self, pending: int) -> int:
+        return self.max_batch
+
+    @abc.abstractmethod
+    async def _run(self, jobs: List[Any]) -> List[Any]:
+        """Process one batch and return one result per job, in order."""
@@ -1,17 +1,19 @@
 import asyncio
 import base64
 import time
-import aiofiles
 import httpx
-from PIL import Image
-import pytesseract
 from core.constants import IMAGE_PARSER_LLM
 from core.config import settings
 import os
 from core.llm.prompts.image_parsing_prompt import image_parsing_prompt
+from core.parsers.normalize_image import get_normalized_image
+from core.parsers.ocr_cache import cached_ocr
+from core.parsers.tesseract_pool import tesseract_engine
+from core.parsers.vision_batch import VisionBatcher
+from core.parsers.work_pools import vision_pool
 
-# Optional for Windows if Tesseract throws errors:
-# pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+# Optional for Windows if Tesseract throws errors, set in .env:
+# TESSERACT_CMD=C:\Program Files\Tesseract-OCR\tesseract.exe
 
 VISION_URL = settings.VISION_URL
 MODEL = IMAGE_PARSER_LLM
@@ -19,28 +21,23 @@ gemma = settings.USE_VISION_MODEL
 REMOTE_GPU = settings.REMOTE_GPU
 VISION_SERVER_PORT = 11434
 
-_SEMAPHORES: dict[tuple[str, int], asyncio.Semaphore] = {}
-_SEMAPHORE_LOCK = asyncio.Lock()
+vision_batcher = VisionBatcher(
+    url=f"http://localhost:{VISION_SERVER_PORT}/api/generate",
+    model=MODEL,
+    max_batch=settings.VISION_BATCH_SIZE,
+    window=settings.VISION_BATCH_WINDOW,
+)
 
 
-async def get_semaphore(port: int, model: str) -> asyncio.Semaphore:
-    """Return a shared semaphore for the given model/port pair."""
-
-    key = (model, port)
-    semaphore = _SEMAPHORES.get(key)
-    if semaphore is not None:
-        return semaphore
-
-    async with _SEMAPHORE_LOCK:
-        semaphore = _SEMAPHORES.get(key)
-        if semaphore is None:
-            _SEMAPHORES[key] = asyncio.Semaphore(1)
-            semaphore = _SEMAPHORES[key]
-
-    return semaphore
+async def image_parser(image_path: str, retries: int = 3) -> str:
+    """
+    Parse image text, reusing the result for identical images recognized
+    before and skipping images too small or flat to hold text.
+    """
+    return await cached_ocr(image_path, lambda: ocr_image(image_path, retries))
 
 
-async def image_parser(image_path: str, retries: int = 3) -> str:
+async def ocr_image(image_path: str, retries: int = 3) -> str:
     """
     Parse image text using Gemma vision API.
 
@@ -51,11 +48,13 @@ async def image_parser(image_path: str, retries: int = 3) -> str:
     empty string if everything fails.
     """
 
-    def tesseract_parse() -> str:
+    async def tesseract_parse() -> str:
         """Fallback OCR with Tesseract."""
         try:
-            image = Image.open(image_path).convert("RGB")
-            return pytesseract.image_to_string(image)
+            data, ext = await get_normalized_image(
+                image_path, settings.TESSERACT_MAX_DIMENSION
+            )
+            return await tesseract_engine.parse(data, ext)
         except Exception as e:
             print(f"[Tesseract] Exception: {e}")
             return ""
@@ -63,12 +62,12 @@ async def image_parser(image_path: str, retries: int = 3) -> str:
     async def remote_gemma_parse() -> str | None:
         """Try Gemma via remote vision API, return plain text or None."""
 
-        semaphore = await get_semaphore(VISION_SERVER_PORT, MODEL)
-        async with semaphore:
+        async with vision_pool.slot():
             for attempt in range(1, retries + 1):
                 try:
-                    async with aiofiles.open(image_path, "rb") as f:
-                        file_content = await f.read()
+                    file_content, _ = await get_normalized_image(
+                        image_path, settings.VISION_MAX_DIMENSION
+                    )
 
                     prompt = image_parsing_prompt()
                     files = {"file": ("filename", file_content)}
@@ -107,47 +106,17 @@ async def image_parser(image_path: str, retries: int = 3) -> str:
     async def local_vision_parse() -> str | None:
         """Try local Ollama vision endpoint, return plain text or None."""
 
-        semaphore = await get_semaphore(VISION_SERVER_PORT, MODEL)
-        async with semaphore:
-            for attempt in range(1, retries + 1):
-                try:
-                    async with aiofiles.open(image_path, "rb") as f:
-                        file_content = await f.read()
-
-                    image_b64 = base64.b64encode(file_content).decode("utf-8")
-                    prompt = image_parsing_prompt()
-                    payload = {
-                        "model": MODEL,
-                        "prompt": prompt,
-                        "images": [image_b64],
-                        "stream": False,
-                    }
-
-                    start_time = time.time()
-                    async with httpx.AsyncClient() as client:
-                        response = await client.post(
-                            f"http://localhost:{VISION_SERVER_PORT}/api/generate",
-                            json=payload,
-                            timeout=300,
-                        )
-                    end_time = time.time()
-
-                    response.raise_for_status()
-                    result = response.json()
-                    text = result.get("completion") or result.get("response") or ""
-                    print(f"Gemma[Local] succeeded in {end_time - start_time:.2f} seconds")
-                    return text
-
-                except httpx.HTTPStatusError as e:
-                    status = e.response.status_code if e.response else "unknown"
-                    body = e.response.text if e.response else ""
-                    print(f"[Gemma[Local] attempt {attempt}] HTTP {status}: {body}")
-                except Exception as e:
-                    print(f"[Gemma[Local] attempt {attempt}] Exception: {e}")
-
-                await asyncio.sleep(1)
+        try:
+            file_content, _ = await get_normalized_image(
+                image_path, settings.VISION_MAX_DIMENSION
+            )
+        except Exception as e:
+            print(f"[Gemma[Local]] Could not read {os.path.basename(image_path)}: {e}")
+            return None
 
-        return None
+        # Packed with other pending images into one multi-image request
+        image_b64 = base64.b64encode(file_content).decode("utf-8")
+        return await vision_batcher.parse(image_b64)
 
     if gemma:
         if REMOTE_GPU:
@@ -169,7 +138,7 @@ async def image_parser(image_path: str, retries: int = 3) -> str:
                     f"Gemma[Local] failed for {os.path.basename(image_path)}, falling back to Tesseract"
                 )
         print(f"processing image: {os.path.basename(image_path)} with Tesseract")
-        return (await asyncio.to_thread(tesseract_parse)).strip()
+        return (await tesseract_parse()).strip()
     except Exception as e:
         print(f"[Fallback Tesseract] Fatal exception: {e}")
         return ""
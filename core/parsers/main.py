@@ -4,15 +4,13 @@ import os
 import shutil
 from pathlib import Path
 import asyncio
-import fitz
 import time
 import markdown
 from bs4 import BeautifulSoup
-from PIL import Image
-import io
 import re
 from app.socket_handler import sio
 from core.parsers.image import image_parser
+from core.parsers.pdf_pages import iter_pdf_pages
 from core.models.document import Document, Page
 from core.parsers.extensions import SUPPORTED_EXTENSIONS, IMAGE_EXTENSIONS
 from pptx import Presentation
@@ -23,6 +21,12 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
 
 
+def document_image_dir(thread_id, path, file_name=None) -> str:
+    """Directory the images extracted from a document are saved in."""
+    name, _ = os.path.splitext(file_name or os.path.basename(path))
+    return f"data/threads/{thread_id or 'unknown_thread'}/images/{name}"
+
+
 def extract_text_from_doc(path: str) -> str:
     """Extract readable text from a legacy .doc file (pure Python)."""
     if not olefile.isOleFile(path):
@@ -105,7 +109,7 @@ async def extract_document(path, title="Untitled", file_name=None, thread_id=Non
                 plain_text = md_text
 
             # Prepare image handling
-            image_dir = f"data/threads/{thread_id}/images/{name}"
+            image_dir = document_image_dir(thread_id, file_path, safe_file_name)
             try:
                 os.makedirs(image_dir, exist_ok=True)
             except Exception:
@@ -261,7 +265,7 @@ async def extract_document(path, title="Untitled", file_name=None, thread_id=Non
         pages = []
         combined_texts = []
         ocr_tasks = {}
-        image_dir = f"data/threads/{thread_id}/images/{name}"
+        image_dir = document_image_dir(thread_id, file_path, safe_file_name)
         try:
             os.makedirs(image_dir, exist_ok=True)
         except Exception:
@@ -362,74 +366,46 @@ async def extract_document(path, title="Untitled", file_name=None, thread_id=Non
         ".html",
         ".xml",
     ]:
-        try:
-            doc = fitz.open(file_path)
-        except Exception as e:
-            print(f"Error opening PDF {safe_file_name}: {e}")
-            traceback.print_exc()
-            return None
         pages = []
-        combined_texts = []
         ocr_tasks = {}
+        page_kinds = {}
 
-        image_dir_base = f"data/threads/{thread_id}/images/{name}"
-
-        for page_number in range(len(doc)):
-            try:
-                page = doc.load_page(page_number)
-                page_text = page.get_text("text")
-            except Exception:
-                traceback.print_exc()
-                page_text = ""
-
-            image_names = []
-            image_dir = image_dir_base
-            try:
-                os.makedirs(image_dir, exist_ok=True)
-            except Exception:
-                traceback.print_exc()
-
-            # Extract embedded raster images and schedule OCR only for these images
-            try:
-                image_list = page.get_images(full=True)
-            except Exception:
-                traceback.print_exc()
-                image_list = []
-
-            for img_index, img in enumerate(image_list):
-                try:
-                    xref = img[0]
-                    base_image = doc.extract_image(xref)
-                    image_bytes = base_image.get("image")
-                    image_ext = base_image.get("ext", "png")
-                    if not image_bytes:
-                        continue
-                    image = Image.open(io.BytesIO(image_bytes))
-
-                    image_name = f"page{page_number + 1}_img{img_index + 1}.{image_ext}"
-                    image_path = os.path.join(image_dir, image_name)
-                    try:
-                        image.save(image_path)
-                    except Exception:
-                        traceback.print_exc()
-                        continue
-
-                    # Put placeholder where the image OCR result should go
-                    placeholder = f"{{PENDING_{image_name}}}"
-                    page_text += f"\n\n{placeholder}"
-                    image_names.append(image_name)
+        image_dir = document_image_dir(thread_id, file_path, safe_file_name)
 
-                    # OCR only raster image files
-                    ocr_tasks[placeholder] = asyncio.create_task(
-                        image_parser(image_path)
+        # Pages are parsed in the process pool; OCR for a page range starts as
+        # soon as that range comes back.
+        try:
+            async for parsed_pages in iter_pdf_pages(file_path, image_dir):
+                for parsed in parsed_pages:
+                    page_text = parsed["text"]
+                    page_kinds[parsed["kind"]] = page_kinds.get(parsed["kind"], 0) + 1
+                    for image_name, image_path in zip(
+                        parsed["images"], parsed["image_paths"]
+                    ):
+                        # Put placeholder where the image OCR result should go
+                        placeholder = f"{{PENDING_{image_name}}}"
+                        page_text += f"\n\n{placeholder}"
+
+                        # One OCR per image file, shared by every page showing it
+                        if placeholder not in ocr_tasks:
+                            ocr_tasks[placeholder] = asyncio.create_task(
+                                image_parser(image_path)
+                            )
+                    pages.append(
+                        Page(
+                            number=parsed["number"],
+                            text=page_text,
+                            images=parsed["images"],
+                        )
                     )
-                except Exception:
-                    traceback.print_exc()
-
-            combined_texts.append(page_text)
-            pages.append(
-                Page(number=page_number + 1, text=page_text, images=image_names)
-            )
+        except Exception as e:
+            print(f"Error opening PDF {safe_file_name}: {e}")
+            traceback.print_exc()
+            for task in ocr_tasks.values():
+                task.cancel()
+            return None
+        pages.sort(key=lambda page: page.number)
+        print(f"Page types for {safe_file_name}: {page_kinds}")
 
         # Wait for OCR tasks from the embedded raster images only
         for placeholder, task in ocr_tasks.items():
@@ -440,13 +416,11 @@ async def extract_document(path, title="Untitled", file_name=None, thread_id=Non
                 traceback.print_exc()
                 image_text = "[Image OCR failed]"
 
-            # Replace placeholder once per occurrence (should be exactly 1)
+            # Replace placeholder once on every page showing the image
             for page in pages:
                 if placeholder in page.text:
                     page.text = page.text.replace(placeholder, image_text, 1)
-            combined_texts = [
-                txt.replace(placeholder, image_text, 1) for txt in combined_texts
-            ]
+        combined_texts = [page.text for page in pages]
 
         doc_id = str(uuid.uuid4())
         end_time = time.time()
@@ -0,0 +1,111 @@
+"""
+Image pre-normalization before OCR and vision calls.
+
+Extracted images can be multi-megabyte PNGs. Before they are uploaded to the
+vision server, sent to Ollama or handed to Tesseract they are downscaled to a
+maximum dimension, flattened onto white when they have transparency, converted
+to grayscale when they are essentially colourless (text, scans, diagrams), and
+recompressed: PNG for grayscale, JPEG otherwise.
+Normalized bytes are cached on disk by (original SHA-256, max dimension).
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+from typing import Tuple
+
+from PIL import Image, ImageOps, ImageStat
+
+from core.config import settings
+
+NORMALIZE_VERSION = "2"
+GRAYSCALE_MAX_SATURATION = 24  # Mean HSV saturation (0-255) treated as colourless
+JPEG_QUALITY = 85
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """
+    Composite an image with transparency onto a white background. A plain
+    convert() would put it on black, hiding dark text on a transparent PNG.
+    """
+    if image.mode == "P" and "transparency" in image.info:
+        image = image.convert("RGBA")
+    if image.mode not in ("RGBA", "LA", "PA"):
+        return image
+    image = image.convert("RGBA")
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def _is_text_like(image: Image.Image) -> bool:
+    saturation = image.convert("RGB").convert("HSV").getchannel("S")
+    return ImageStat.Stat(saturation).mean[0] <= GRAYSCALE_MAX_SATURATION
+
+
+def normalize_bytes(data: bytes, max_dimension: int) -> Tuple[bytes, str]:
+    """Return (normalized bytes, extension) for the encoded image."""
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        flattened = _flatten(image)
+        transparent = flattened is not image
+        image = flattened
+        resized = max(image.size) > max_dimension
+        if resized:
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        buffer = io.BytesIO()
+        if _is_text_like(image):
+            image.convert("L").save(buffer, format="PNG", optimize=True)
+            ext = "png"
+        else:
+            image.convert("RGB").save(
+                buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True
+            )
+            ext = "jpg"
+        original_format = (original.format or "").lower()
+
+    normalized = buffer.getvalue()
+    if not resized and not transparent and len(normalized) >= len(data):
+        # Nothing gained, keep the original encoding
+        return data, "jpg" if original_format == "jpeg" else original_format or ext
+    return normalized, ext
+
+
+def normalize_image(image_path: str, max_dimension: int) -> Tuple[bytes, str]:
+    """Normalized bytes of the image file, served from the disk cache when possible."""
+    with open(image_path, "rb") as f:
+        data = f.read()
+    if not settings.NORMALIZE_IMAGES:
+        return data, os.path.splitext(image_path)[1].lstrip(".").lower() or "png"
+
+    digest = hashlib.sha256(data).hexdigest()
+    key = f"{digest}-{max_dimension}-v{NORMALIZE_VERSION}"
+    cache_dir = settings.NORMALIZED_IMAGE_DIR
+    for ext in ("png", "jpg", "jpeg", "gif", "bmp", "tiff", "webp"):
+        path = os.path.join(cache_dir, f"{key}.{ext}")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read(), ext
+
+    normalized, ext = normalize_bytes(data, max_dimension)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, f"{key}.{ext}")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(normalized)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[normalize] Failed to cache {os.path.basename(image_path)}: {e}")
+    return normalized, ext
+
+
+async def get_normalized_image(image_path: str, max_dimension: int) -> Tuple[bytes, str]:
+    try:
+        return await asyncio.to_thread(normalize_image, image_path, max_dimension)
+    except Exception as e:
+        print(f"[normalize] Using original {os.path.basename(image_path)}: {e}")
+        with open(image_path, "rb") as f:
+            return f.read(), os.path.splitext(image_path)[1].lstrip(".").lower() or "png"
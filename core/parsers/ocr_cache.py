@@ -0,0 +1,167 @@
+"""
+Deployment-wide cache of image OCR results.
+
+Images are looked up by the SHA-256 of their bytes only. Perceptual hashes
+are deliberately not used: two slides with the same layout but different text
+can hash within a few bits of each other, and a shared cache would then hand
+one image's text to another. Each unique image is recognized once; images that
+are too small or too flat (low entropy) to carry text are skipped. Results are
+kept as one JSON file per image under OCR_CACHE_DIR.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from core.config import settings
+
+OCR_CACHE_VERSION = "1"
+MIN_SIDE = 32  # Pixels
+MIN_PIXELS = 64 * 64
+MIN_ENTROPY = 0.1  # Bits of the grayscale histogram, ~0 for blank or solid images
+
+stats = {"hits": 0, "misses": 0, "shared": 0, "skipped": 0}
+
+# Set by a caller (the parse cache) that needs to know whether every image it
+# asked for was recognized; names of images whose OCR came back empty or
+# raised are appended to the list.
+ocr_failures: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar(
+    "ocr_failures", default=None
+)
+
+
+class OcrCache:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.entries: Optional[Dict[str, str]] = None  # sha -> text
+
+    def _load(self) -> Dict[str, str]:
+        if self.entries is None:
+            entries = {}
+            os.makedirs(self.directory, exist_ok=True)
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(f"-v{OCR_CACHE_VERSION}.json"):
+                    continue
+                try:
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    entries[data["sha"]] = data["text"]
+                except Exception as e:
+                    print(f"[ocr-cache] Ignoring unreadable entry {entry.name}: {e}")
+            self.entries = entries
+        return self.entries
+
+    def find(self, sha: str) -> Optional[str]:
+        with self.lock:
+            return self._load().get(sha)
+
+    def put(self, sha: str, text: str) -> None:
+        path = os.path.join(self.directory, f"{sha}-v{OCR_CACHE_VERSION}.json")
+        with self.lock:
+            self._load()[sha] = text
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"sha": sha, "text": text}, f)
+            os.replace(tmp_path, path)
+
+
+def analyze_image(image_path: str) -> Tuple[str, bool]:
+    """Return (sha256, worth_ocr) for the image file."""
+    with open(image_path, "rb") as f:
+        data = f.read()
+    sha = hashlib.sha256(data).hexdigest()
+    with Image.open(image_path) as image:
+        width, height = image.size
+        gray = image.convert("L")
+        worth_ocr = (
+            min(width, height) >= MIN_SIDE
+            and width * height >= MIN_PIXELS
+            and gray.entropy() >= MIN_ENTROPY
+        )
+        return sha, worth_ocr
+
+
+_cache = OcrCache(settings.OCR_CACHE_DIR)
+# sha -> pending OCR
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+def _note_failure(image_path: str) -> None:
+    failures = ocr_failures.get()
+    if failures is not None:
+        failures.append(os.path.basename(image_path))
+
+
+async def _checked(image_path: str, recognize: Awaitable[str]) -> str:
+    try:
+        text = await recognize
+    except Exception:
+        _note_failure(image_path)
+        raise
+    if not text:
+        _note_failure(image_path)
+    return text
+
+
+async def cached_ocr(image_path: str, ocr: Callable[[], Awaitable[str]]) -> str:
+    """
+    OCR the image with ocr() unless an image with identical bytes was
+    recognized before (or is being recognized right now).
+    """
+    if not settings.OCR_CACHE_ENABLED:
+        return await _checked(image_path, ocr())
+
+    try:
+        sha, worth_ocr = await asyncio.to_thread(analyze_image, image_path)
+    except Exception as e:
+        print(f"[ocr-cache] Could not analyze {os.path.basename(image_path)}: {e}")
+        return await _checked(image_path, ocr())
+
+    if not worth_ocr:
+        stats["skipped"] += 1
+        return ""
+
+    text = await asyncio.to_thread(_cache.find, sha)
+    if text is not None:
+        stats["hits"] += 1
+        return text
+
+    pending = _in_flight.get(sha)
+    if pending is not None:
+        stats["shared"] += 1
+        try:
+            return await _checked(image_path, asyncio.shield(pending))
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # The task doing the OCR was cancelled, not this one
+            return await _checked(image_path, ocr())
+
+    stats["misses"] += 1
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[sha] = future
+    try:
+        text = await _checked(image_path, ocr())
+        if text:
+            try:
+                await asyncio.to_thread(_cache.put, sha, text)
+            except Exception as e:
+                print(f"[ocr-cache] Failed to store {sha}: {e}")
+        future.set_result(text)
+        return text
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()
+        raise
+    finally:
+        _in_flight.pop(sha, None)
@@ -0,0 +1,214 @@
+"""
+Content-addressed cache of parsed documents.
+
+A Document is stored once per (SHA-256 of the file bytes, PARSER_VERSION), so
+the same deck or PDF uploaded to any thread or cluster is only parsed and
+OCR'd once. The images extracted from it are stored next to the Document and
+linked into the image directory of every thread that reuses it, so deleting
+one thread does not break the others. Bump PARSER_VERSION whenever a change to
+the parsers would produce different text for the same file.
+
+A Document in which some image OCR came back empty or failed (e.g. the vision
+server timed out) is stored as incomplete and only reused for
+PARSE_CACHE_INCOMPLETE_TTL seconds, so a one-off failure is retried.
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from core.config import settings
+from core.models.document import Document
+from core.parsers.ocr_cache import ocr_failures
+
+PARSER_VERSION = "9"
+CHUNK_SIZE = 1024 * 1024
+
+_in_flight: Dict[str, asyncio.Future] = {}
+stats = {"hits": 0, "misses": 0, "shared": 0}
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _path(key: str, complete: bool = True) -> str:
+    suffix = "json" if complete else "incomplete.json"
+    return os.path.join(settings.PARSE_CACHE_DIR, f"{key}.{suffix}")
+
+
+def _read(path: str, key: str) -> Optional[Document]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return Document.model_validate_json(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[parse-cache] Ignoring unreadable entry {key}: {e}")
+        return None
+
+
+def _load(key: str) -> Optional[Document]:
+    document = _read(_path(key), key)
+    if document is not None:
+        return document
+    path = _path(key, complete=False)
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+    if age > settings.PARSE_CACHE_INCOMPLETE_TTL:
+        return None
+    return _read(path, key)
+
+
+def _image_names(document: Document) -> set:
+    return {name for page in document.content for name in (page.images or [])}
+
+
+def _link(src: str, dst: str) -> None:
+    """Hardlink src to dst, copying when the two are on different filesystems."""
+    tmp_path = f"{dst}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copy2(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def _save(
+    key: str, document: Document, image_dir: Optional[str], complete: bool = True
+) -> None:
+    os.makedirs(settings.PARSE_CACHE_DIR, exist_ok=True)
+    if image_dir:
+        cache_image_dir = os.path.join(settings.PARSE_CACHE_DIR, key)
+        os.makedirs(cache_image_dir, exist_ok=True)
+        for name in _image_names(document):
+            src = os.path.join(image_dir, name)
+            if os.path.exists(src):
+                _link(src, os.path.join(cache_image_dir, name))
+    path = _path(key, complete)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(document.model_dump_json())
+    os.replace(tmp_path, path)
+    if complete:
+        try:
+            os.remove(_path(key, complete=False))
+        except FileNotFoundError:
+            pass
+
+
+def _restore_images(key: str, document: Document, image_dir: str) -> None:
+    """Give the reusing thread its own links to the cached document's images."""
+    cache_image_dir = os.path.join(settings.PARSE_CACHE_DIR, key)
+    names = _image_names(document)
+    if names:
+        os.makedirs(image_dir, exist_ok=True)
+    for name in names:
+        src = os.path.join(cache_image_dir, name)
+        if os.path.exists(src):
+            _link(src, os.path.join(image_dir, name))
+        else:
+            print(f"[parse-cache] Image {name} of {key} is missing from the cache")
+
+
+async def cached_parse(
+    path: str,
+    file_name: Optional[str],
+    title: str,
+    parse: Callable[[], Awaitable[Optional[Document]]],
+    image_dir: Optional[str] = None,
+) -> Optional[Document]:
+    """
+    Return the parsed Document for the file at path, calling parse() only if
+    no Document for the same bytes and parser version exists. Concurrent
+    uploads of the same file share one parse. image_dir is where this upload's
+    parse writes (or a reused Document's images are linked to).
+    """
+    if not settings.PARSE_CACHE_ENABLED:
+        return await parse()
+
+    try:
+        digest = await asyncio.to_thread(file_digest, path)
+    except OSError as e:
+        print(f"[parse-cache] Could not hash {path}: {e}")
+        return await parse()
+    key = f"{digest}-v{PARSER_VERSION}"
+
+    document = await asyncio.to_thread(_load, key)
+    reused = document is not None
+    if reused:
+        stats["hits"] += 1
+        print(f"[parse-cache] Reusing parsed {file_name or path}")
+    elif key in _in_flight:
+        stats["shared"] += 1
+        pending = _in_flight[key]
+        try:
+            document = await asyncio.shield(pending)
+            reused = True
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # The upload doing the parse was cancelled, not this one
+            document = await parse()
+    else:
+        stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        _in_flight[key] = future
+        failures: list = []
+        token = ocr_failures.set(failures)
+        try:
+            try:
+                document = await parse()
+            finally:
+                ocr_failures.reset(token)
+            if document is not None:
+                if failures:
+                    print(
+                        f"[parse-cache] OCR came back empty or failed for {len(failures)} "
+                        f"image(s) of {file_name or path}, keeping it for "
+                        f"{settings.PARSE_CACHE_INCOMPLETE_TTL} seconds"
+                    )
+                try:
+                    await asyncio.to_thread(
+                        _save, key, document, image_dir, not failures
+                    )
+                except Exception as e:
+                    print(f"[parse-cache] Failed to store {key}: {e}")
+            future.set_result(document)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; avoid "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            _in_flight.pop(key, None)
+
+    if document is None:
+        return None
+    if reused and image_dir:
+        try:
+            await asyncio.to_thread(_restore_images, key, document, image_dir)
+        except Exception as e:
+            print(f"[parse-cache] Failed to link images of {key}: {e}")
+    # Same content, but this upload's own id and names
+    return document.model_copy(
+        update={
+            "id": str(uuid.uuid4()),
+            "file_name": file_name or document.file_name,
+            "title": title,
+        },
+        deep=True,
+    )
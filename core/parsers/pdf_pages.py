@@ -0,0 +1,232 @@
+"""
+PyMuPDF parsing off the event loop.
+
+PDF-like documents are split into page ranges that are parsed in a bounded
+process pool, so large files use several cores and the FastAPI/Socket.IO loop
+stays responsive. Each page is classified by its text layer: scanned pages are
+rendered to one image, mixed pages have their embedded images saved, and text
+pages need no OCR. Workers return plain page dicts; the caller schedules OCR
+as soon as each range comes back.
+"""
+
+import asyncio
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Tuple
+
+import fitz
+
+from core.config import settings
+
+PAGES_PER_SHARD = 16
+MIN_TEXT_CHARS = 20  # Less extractable text than this and the page is treated as scanned
+TEXT_PAGE_MAX_IMAGE_COVERAGE = 0.1  # Images covering more of a text page get OCR'd
+FULL_PAGE_IMAGE_COVERAGE = 0.9  # A lone image this large under text is a searchable scan
+# Embedded images below these sizes are decorative (bullets, rules, icons)
+MIN_IMAGE_SIDE = 32  # Pixels
+MIN_IMAGE_PIXELS = 80 * 80
+MIN_IMAGE_PAGE_FRACTION = 0.02  # Of the page area the image is drawn on
+DIRECT_EXTENSIONS = {"png", "jpg", "jpeg", "bmp", "gif", "tiff", "webp"}
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.PARSER_PROCESSES or None)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def count_pages(file_path: str) -> int:
+    with fitz.open(file_path) as doc:
+        return len(doc)
+
+
+def page_ranges(page_count: int, size: int = PAGES_PER_SHARD) -> List[Tuple[int, int]]:
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def image_placements(page: "fitz.Page") -> List[float]:
+    """Fraction of the page area covered by each placed image."""
+    page_area = abs(page.rect) or 1
+    return [
+        abs(fitz.Rect(info["bbox"]) & page.rect) / page_area
+        for info in page.get_image_info()
+    ]
+
+
+def classify_page(page_text: str, placements: List[float]) -> str:
+    """
+    "scanned": no usable text layer, the page is rendered and OCR'd as a whole
+    (scans and vector-only pages). "text": a text layer with at most incidental
+    images, or a searchable scan (one page-sized image under an OCR'd text
+    layer), nothing is OCR'd. "mixed": a text layer plus images worth OCR.
+    """
+    if len(page_text.strip()) < MIN_TEXT_CHARS:
+        return "scanned"
+    if len(placements) == 1 and placements[0] >= FULL_PAGE_IMAGE_COVERAGE:
+        return "text"
+    # Overlapping images are counted twice
+    if min(1.0, sum(placements)) <= TEXT_PAGE_MAX_IMAGE_COVERAGE:
+        return "text"
+    return "mixed"
+
+
+def is_decorative(page: "fitz.Page", xref: int, width: int, height: int) -> bool:
+    """Too few pixels, or drawn too small on the page, to carry readable text."""
+    if min(width, height) < MIN_IMAGE_SIDE or width * height < MIN_IMAGE_PIXELS:
+        return True
+    drawn = sum(abs(rect & page.rect) for rect in page.get_image_rects(xref))
+    return drawn < MIN_IMAGE_PAGE_FRACTION * abs(page.rect)
+
+
+def encoded_image(doc: "fitz.Document", xref: int) -> Tuple[bytes, str]:
+    """
+    The image's original encoded bytes and extension, written as-is. Formats
+    the OCR backends cannot read (JPX, JBIG2, ...) are converted to PNG.
+    """
+    base_image = doc.extract_image(xref)
+    image_bytes = base_image.get("image")
+    image_ext = (base_image.get("ext") or "png").lower()
+    if image_bytes and image_ext not in DIRECT_EXTENSIONS:
+        pixmap = fitz.Pixmap(doc, xref)
+        if pixmap.n - pixmap.alpha > 3:
+            pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+        image_bytes, image_ext = pixmap.tobytes("png"), "png"
+    return image_bytes, image_ext
+
+
+def parse_page_range(
+    file_path: str, start: int, end: int, image_dir: str, dpi: int = 200
+) -> List[dict]:
+    """
+    Runs in a worker process. Extracts the text of pages [start, end), renders
+    text-less pages at `dpi` and saves the embedded raster images of mixed
+    pages under image_dir, once per image object (xref) and skipping
+    decorative ones. Image files are named by xref, so pages in other ranges
+    that show the same image resolve to the same file.
+    """
+    try:
+        os.makedirs(image_dir, exist_ok=True)
+    except Exception:
+        traceback.print_exc()
+
+    pages = []
+    saved_xrefs = {}  # xref -> (image name, path)
+    with fitz.open(file_path) as doc:
+        for page_number in range(start, end):
+            try:
+                page = doc.load_page(page_number)
+                page_text = page.get_text("text")
+            except Exception:
+                traceback.print_exc()
+                page = None
+                page_text = ""
+
+            try:
+                placements = image_placements(page) if page else []
+            except Exception:
+                traceback.print_exc()
+                placements = [1.0, 1.0]  # Unknown, OCR the images to be safe
+            kind = classify_page(page_text, placements)
+            if kind == "scanned" and doc.is_reflowable:
+                # Text formats (.txt, .docx, ...) have no scans, just empty pages
+                kind = "text"
+
+            image_names = []
+            image_paths = []
+            if kind == "scanned" and page is not None:
+                try:
+                    image_name = f"page{page_number + 1}_render.png"
+                    image_path = os.path.join(image_dir, image_name)
+                    page.get_pixmap(dpi=dpi).save(image_path)
+                    image_names.append(image_name)
+                    image_paths.append(image_path)
+                except Exception:
+                    traceback.print_exc()
+
+            try:
+                image_list = (
+                    page.get_images(full=True) if page and kind == "mixed" else []
+                )
+            except Exception:
+                traceback.print_exc()
+                image_list = []
+
+            for img in image_list:
+                xref, width, height = img[0], img[2], img[3]
+                try:
+                    if xref in saved_xrefs:
+                        # Same image object as on an earlier page, saved once
+                        image_name, image_path = saved_xrefs[xref]
+                        if image_name not in image_names:
+                            image_names.append(image_name)
+                            image_paths.append(image_path)
+                        continue
+                    if is_decorative(page, xref, width, height):
+                        continue
+
+                    image_bytes, image_ext = encoded_image(doc, xref)
+                    if not image_bytes:
+                        continue
+                    image_name = f"xref{xref}.{image_ext}"
+                    image_path = os.path.join(image_dir, image_name)
+                    tmp_path = f"{image_path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "wb") as f:
+                        f.write(image_bytes)
+                    os.replace(tmp_path, image_path)
+                    saved_xrefs[xref] = (image_name, image_path)
+                    image_names.append(image_name)
+                    image_paths.append(image_path)
+                except Exception:
+                    traceback.print_exc()
+
+            pages.append(
+                {
+                    "number": page_number + 1,
+                    "text": page_text,
+                    "kind": kind,
+                    "images": image_names,
+                    "image_paths": image_paths,
+                }
+            )
+    return pages
+
+
+async def iter_pdf_pages(file_path: str, image_dir: str) -> AsyncIterator[List[dict]]:
+    """
+    Parse the document in the process pool and yield each page range as soon
+    as it is done (in completion order). Raises if the file cannot be opened;
+    a range that fails later is logged and skipped.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    page_count = await loop.run_in_executor(executor, count_pages, file_path)
+
+    futures = [
+        loop.run_in_executor(
+            executor,
+            parse_page_range,
+            file_path,
+            start,
+            end,
+            image_dir,
+            settings.PDF_RENDER_DPI,
+        )
+        for start, end in page_ranges(page_count)
+    ]
+    for future in asyncio.as_completed(futures):
+        try:
+            yield await future
+        except Exception as e:
+            print(f"Error parsing pages of {os.path.basename(file_path)}: {e}")
+            traceback.print_exc()
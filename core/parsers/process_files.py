@@ -6,9 +6,12 @@ import aiofiles
 import asyncio
 
 from core.models.document import Documents
-from core.parsers.main import extract_document
+from core.parsers.main import document_image_dir, extract_document
+from core.parsers.parse_cache import cached_parse
+from core.parsers.work_pools import file_pool, parse_priority
 import time
 from app.broadcast import update_message, stop_broadcasting
+from app.socket_handler import sio
 
 
 # ppt, pdf, xlsx, doc, docx, txt, html, png, jpeg, jpg, md
@@ -18,7 +21,9 @@ async def process_files(
 ) -> Documents:
     """
     Process a list of uploaded files:
-    - Pass each file to the document parser.
+    - Pass each file to the document parser. Files wait for the shared file
+      pool smallest-first, and progress is emitted per file to
+      `{thread_id}/file_progress`.
     - Store the parsed result as JSON in `data/threads/{thread_id}/parsed/`.
     - Accumulate all parsed documents into a Documents object.
 
@@ -33,26 +38,72 @@ async def process_files(
 
     documents = Documents(documents=[], thread_id=thread_id)
     start_time = time.time()
+    total = len(files_data)
+    finished = 0
 
-    # Helper to process one file
-    async def process_file(file_data):
+    async def report(file_data, status: str):
         try:
-            try:
+            await sio.emit(
+                f"{thread_id}/file_progress",
+                {
+                    "file_name": file_data.get("file_name"),
+                    "status": status,
+                    "done": finished,
+                    "total": total,
+                },
+            )
+            if status in ("done", "failed"):
                 await update_message(
-                    {"message": f"Processing files..."},
+                    {"message": f"Processing files... ({finished}/{total})"},
                     topic=f"{thread_id}/status_update",
                 )
-            except Exception as e:
-                print(f"[emit-error] progress emit failed: {e}")
+        except Exception as e:
+            print(f"[emit-error] progress emit failed: {e}")
 
-            parsed_data = None
-            try:
-                parsed_data = await extract_document(
+    async def parse_file(file_data):
+        try:
+            size = os.path.getsize(file_data.get("path"))
+        except OSError:
+            size = 0
+        # Smaller files first; OCR tasks spawned while parsing inherit this
+        parse_priority.set(size)
+
+        async def parse():
+            async with file_pool.slot(size):
+                await report(file_data, "parsing")
+                return await extract_document(
                     path=file_data.get("path"),
                     title=file_data.get("title", "Untitled"),
                     file_name=file_data.get("file_name"),
                     thread_id=thread_id,
                 )
+
+        # Files already parsed for any thread skip parsing and OCR entirely
+        return await cached_parse(
+            path=file_data.get("path"),
+            file_name=file_data.get("file_name"),
+            title=file_data.get("title", "Untitled"),
+            parse=parse,
+            image_dir=document_image_dir(
+                thread_id, file_data.get("path"), file_data.get("file_name")
+            ),
+        )
+
+    # Helper to process one file
+    async def process_file(file_data):
+        nonlocal finished
+        parsed_data = await parse_and_store(file_data)
+        finished += 1
+        await report(file_data, "done" if parsed_data else "failed")
+        return parsed_data
+
+    async def parse_and_store(file_data):
+        try:
+            await report(file_data, "queued")
+
+            parsed_data = None
+            try:
+                parsed_data = await parse_file(file_data)
             except Exception as e:
                 print(f"[parse-error] {file_data.get('file_name')}: {e}")
                 return None
@@ -87,24 +138,21 @@ async def process_files(
             )
             return None
 
-    batch_size = 10
-    # Process in batches
-    for i in range(0, len(files_data), batch_size):
-        batch = files_data[i : i + batch_size]
-        try:
-            results = await asyncio.gather(
-                *(process_file(file_data) for file_data in batch),
-                return_exceptions=True,
-            )
-        except Exception as e:
-            print(f"[batch-error] Failed batch starting at {i}: {e}")
-            results = []
-        for result in results:
-            if isinstance(result, Exception):
-                print(f"[task-exception] {result}")
-                continue
-            if result:
-                documents.documents.append(result)
+    # No batches: every file queues on the shared file pool right away
+    try:
+        results = await asyncio.gather(
+            *(process_file(file_data) for file_data in files_data),
+            return_exceptions=True,
+        )
+    except Exception as e:
+        print(f"[gather-error] Failed processing files: {e}")
+        results = []
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"[task-exception] {result}")
+            continue
+        if result:
+            documents.documents.append(result)
 
     end_time = time.time()
     try:
@@ -0,0 +1,176 @@
+"""
+Tesseract OCR engine on a dedicated process pool.
+
+Workers are started once with the configured language and page segmentation
+mode and keep them (plus the resolved tesseract binary) as warm state. Images
+arriving within `window` seconds of each other are sent to a worker as one
+batch, which the worker recognizes with a single tesseract invocation over a
+list file; if the output cannot be split per image the batch is recognized one
+image at a time instead. Pending images are split over the workers rather
+than filling one batch, so a burst of pages keeps every worker busy. Latency
+is reported with every batch as its wall time per image.
+"""
+
+import asyncio
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import pytesseract
+
+from core.config import settings
+from core.parsers.batching import WindowBatcher
+from core.parsers.work_pools import ocr_pool
+
+PAGE_SEPARATOR = "\f"  # Tesseract's text output ends every page with a form feed
+
+_worker_options: dict = {}
+
+
+def _init_worker(lang: str, psm: int, tesseract_cmd: str) -> None:
+    """Runs once per worker process."""
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    _worker_options["lang"] = lang
+    _worker_options["config"] = f"--psm {psm}"
+    try:
+        # Resolves the binary and warms the OS cache before the first batch
+        pytesseract.get_tesseract_version()
+    except Exception as e:
+        print(f"[Tesseract] Worker {os.getpid()} could not start tesseract: {e}")
+
+
+def _recognize(path: str) -> str:
+    return pytesseract.image_to_string(
+        path, lang=_worker_options.get("lang"), config=_worker_options.get("config", "")
+    )
+
+
+def ocr_batch(images: List[Tuple[bytes, str]]) -> List[Tuple[str, float]]:
+    """
+    Runs in a worker process. Recognizes (bytes, extension) images and returns
+    (text, seconds) for each, in order. When the images are recognized in one
+    invocation, seconds is that invocation's wall time divided by the count.
+    """
+    with tempfile.TemporaryDirectory(prefix="ocr-") as tmp_dir:
+        paths = []
+        for i, (data, ext) in enumerate(images):
+            path = os.path.join(tmp_dir, f"{i}.{ext}")
+            with open(path, "wb") as f:
+                f.write(data)
+            paths.append(path)
+
+        if len(paths) > 1:
+            list_path = os.path.join(tmp_dir, "batch.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(paths) + "\n")
+            start_time = time.time()
+            try:
+                pages = _recognize(list_path).split(PAGE_SEPARATOR)
+                # One entry per image plus whatever follows the last separator
+                if len(pages) == len(paths) + 1:
+                    seconds = (time.time() - start_time) / len(paths)
+                    return [(text.strip(), seconds) for text in pages[:-1]]
+                print(f"[Tesseract] Got {len(pages) - 1} pages for {len(paths)} images")
+            except Exception as e:
+                print(f"[Tesseract] Batch exception: {e}")
+
+        results = []
+        for path in paths:
+            start_time = time.time()
+            try:
+                text = _recognize(path).strip()
+            except Exception as e:
+                print(f"[Tesseract] Exception: {e}")
+                text = ""
+            results.append((text, time.time() - start_time))
+        return results
+
+
+class TesseractEngine(WindowBatcher):
+    def __init__(
+        self,
+        workers: int,
+        lang: str = "eng",
+        psm: int = 3,
+        tesseract_cmd: str = "",
+        max_batch: int = 8,
+        window: float = 0.05,
+    ):
+        super().__init__(max_batch, window)
+        self.workers = workers
+        self.lang = lang
+        self.psm = psm
+        self.tesseract_cmd = tesseract_cmd
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.batches = 0
+        self.images = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.lang, self.psm, self.tesseract_cmd),
+            )
+        return self._executor
+
+    async def parse(self, data: bytes, ext: str) -> str:
+        """Queue one encoded image; returns its text, or "" if recognition failed."""
+        return await self.submit((data, ext)) or ""
+
+    def _batch_size(self, pending: int) -> int:
+        # Spread a burst over every worker instead of one serial invocation
+        return max(1, min(self.max_batch, math.ceil(pending / self.workers)))
+
+    async def _run(self, images: List[Tuple[bytes, str]]) -> List[str]:
+        async with ocr_pool.slot():
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self._get_executor(), ocr_batch, images)
+
+        seconds = [elapsed for _, elapsed in results]
+        self.batches += 1
+        self.images += len(results)
+        self.total_seconds += sum(seconds)
+        self.max_seconds = max([self.max_seconds, *seconds])
+        print(
+            f"[Tesseract] Recognized {len(results)} images in {sum(seconds):.2f} seconds "
+            f"({sum(seconds) / max(1, len(seconds)):.2f} seconds per image)"
+        )
+        return [text for text, _ in results]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "lang": self.lang,
+            "psm": self.psm,
+            "max_batch": self.max_batch,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "images": self.images,
+            # Batch wall time divided by its images, not measured per image
+            "avg_batch_seconds_per_image": round(self.total_seconds / self.images, 3)
+            if self.images
+            else None,
+            "max_batch_seconds_per_image": round(self.max_seconds, 3),
+        }
+
+
+tesseract_engine = TesseractEngine(
+    workers=ocr_pool.size,
+    lang=settings.TESSERACT_LANG,
+    psm=settings.TESSERACT_PSM,
+    tesseract_cmd=settings.TESSERACT_CMD,
+    max_batch=settings.TESSERACT_BATCH_SIZE,
+    window=settings.TESSERACT_BATCH_WINDOW,
+)
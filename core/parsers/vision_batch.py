@@ -0,0 +1,129 @@
+"""
+Batching layer for the local Ollama vision model.
+
+OCR jobs that arrive within `window` seconds of each other are packed into a
+single /api/generate request (Ollama accepts a list of `images`), up to
+`max_batch` images per request. The model is asked for one JSON entry per
+image and the response is split back to the waiting jobs. If a batch answer
+cannot be split cleanly, its images are sent again one per request. Requests
+in flight are bounded by the shared vision pool.
+"""
+
+import asyncio
+import json
+import time
+from typing import List, Optional
+
+import httpx
+
+from core.llm.prompts.image_parsing_prompt import (
+    batch_image_parsing_prompt,
+    image_parsing_prompt,
+)
+from core.parsers.batching import WindowBatcher
+from core.parsers.work_pools import vision_pool
+
+
+class VisionBatcher(WindowBatcher):
+    def __init__(
+        self,
+        url: str,
+        model: str,
+        max_batch: int = 4,
+        window: float = 0.25,
+        retries: int = 3,
+    ):
+        super().__init__(max_batch, window)
+        self.url = url
+        self.model = model
+        self.retries = retries
+        self._client: Optional[httpx.AsyncClient] = None
+        self.batches = 0
+        self.images = 0
+        self.split_failures = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=300)
+        return self._client
+
+    async def parse(self, image_b64: str) -> Optional[str]:
+        """Queue one base64 image; returns its text, or None if the model failed."""
+        return await self.submit(image_b64)
+
+    async def _run(self, images: List[str]) -> List[Optional[str]]:
+        async with vision_pool.slot():
+            split = await self._generate_batch(images) if len(images) > 1 else None
+            if split is not None:
+                return split
+            return [await self._generate_single(image_b64) for image_b64 in images]
+
+    async def _generate(self, prompt: str, images: List[str], as_json: bool) -> str:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "images": images,
+            "stream": False,
+        }
+        if as_json:
+            payload["format"] = "json"
+        response = await self._get_client().post(self.url, json=payload)
+        response.raise_for_status()
+        result = response.json()
+        return result.get("completion") or result.get("response") or ""
+
+    async def _generate_batch(self, images: List[str]) -> Optional[List[str]]:
+        """One request for all images; None if the answer cannot be split per image."""
+        try:
+            start_time = time.time()
+            raw = await self._generate(
+                batch_image_parsing_prompt(len(images)), images, as_json=True
+            )
+            entries = json.loads(raw).get("images") or []
+            by_index = {
+                int(entry["index"]): str(entry.get("text") or "") for entry in entries
+            }
+            texts = [by_index.get(i + 1) for i in range(len(images))]
+            if any(text is None for text in texts):
+                raise ValueError(f"expected {len(images)} entries, got {len(entries)}")
+            self.batches += 1
+            self.images += len(images)
+            print(
+                f"Gemma[Local] parsed {len(images)} images in one request "
+                f"in {time.time() - start_time:.2f} seconds"
+            )
+            return texts
+        except Exception as e:
+            self.split_failures += 1
+            print(f"[Gemma[Local] batch] Falling back to single images: {e}")
+            return None
+
+    async def _generate_single(self, image_b64: str) -> Optional[str]:
+        for attempt in range(1, self.retries + 1):
+            try:
+                start_time = time.time()
+                text = await self._generate(
+                    image_parsing_prompt(), [image_b64], as_json=False
+                )
+                print(f"Gemma[Local] succeeded in {time.time() - start_time:.2f} seconds")
+                self.images += 1
+                return text
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code if e.response else "unknown"
+                body = e.response.text if e.response else ""
+                print(f"[Gemma[Local] attempt {attempt}] HTTP {status}: {body}")
+            except Exception as e:
+                print(f"[Gemma[Local] attempt {attempt}] Exception: {e}")
+
+            await asyncio.sleep(1)
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "max_batch": self.max_batch,
+            "window_seconds": self.window,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "images": self.images,
+            "split_failures": self.split_failures,
+        }
@@ -0,0 +1,106 @@
+"""
+Shared, bounded work pools for document parsing.
+
+Uploads from every thread compete for three pools instead of fixed batches:
+`file_pool` bounds how many documents are parsed at once, `ocr_pool` bounds
+Tesseract runs and `vision_pool` bounds requests to the vision model. Waiters
+are served smallest-first by priority (the file size), so a large PDF does not
+hold up the small files queued behind it, and whichever slot frees up first
+takes the next file. Image OCR inherits the priority of the file it came from
+through the `parse_priority` context variable.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+
+from core.config import settings
+
+parse_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "parse_priority", default=0
+)
+
+
+class PriorityPool:
+    """Asyncio admission control with `size` slots, lowest priority value first."""
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = max(1, size)
+        self.in_use = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()  # FIFO among equal priorities
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_queued = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    async def acquire(self, priority: Optional[int] = None) -> None:
+        if priority is None:
+            priority = parse_priority.get()
+        if self.in_use < self.size and not self._waiters:
+            self.in_use += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just before cancellation, pass it on
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self.in_use -= 1
+        while self._waiters and self.in_use < self.size:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                continue
+            self.in_use += 1
+            waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None):
+        start = time.time()
+        await self.acquire(priority)
+        self.total_wait += time.time() - start
+        try:
+            yield
+        finally:
+            self.completed += 1
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "pool": self.name,
+            "size": self.size,
+            "in_use": self.in_use,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "avg_wait_seconds": (
+                round(self.total_wait / self.completed, 3) if self.completed else 0.0
+            ),
+        }
+
+
+_cpus = os.cpu_count() or 1
+
+file_pool = PriorityPool("files", settings.PARSER_MAX_FILES or _cpus)
+ocr_pool = PriorityPool("ocr", settings.OCR_WORKERS or max(1, _cpus // 2))
+vision_pool = PriorityPool("vision", settings.VISION_MAX_IN_FLIGHT)
+
+
+def pool_stats() -> List[dict]:
+    return [pool.stats() for pool in (file_pool, ocr_pool, vision_pool)]
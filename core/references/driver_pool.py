@@ -0,0 +1,171 @@
+"""
+Pool of reusable headless Chrome drivers for Google Scholar scraping.
+
+Scholar lookups run in executor threads, one per worklet. Instead of installing
+chromedriver and starting a stealth browser for every query, drivers are kept
+alive and lent out one query at a time. At most SCHOLAR_BROWSER_POOL_SIZE
+browsers exist at once; a driver is recycled after SCHOLAR_BROWSER_MAX_PAGES
+page loads or as soon as it raises or fails a liveness check. Browsers are
+only started when a lookup needs one (or on boot with SCHOLAR_BROWSER_WARMUP).
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium_stealth import stealth
+from webdriver_manager.chrome import ChromeDriverManager
+
+from core.config import settings
+
+
+@lru_cache(maxsize=1)
+def resolve_driver_path() -> str:
+    """Install/locate chromedriver once per process."""
+    return ChromeDriverManager().install()
+
+
+def create_driver() -> webdriver.Chrome:
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_experimental_option(
+        "excludeSwitches", ["enable-automation", "enable-logging"]
+    )
+    options.add_experimental_option("useAutomationExtension", False)
+
+    driver = webdriver.Chrome(
+        service=Service(resolve_driver_path()), options=options
+    )
+    stealth(
+        driver,
+        languages=["en-US", "en"],
+        vendor="Google Inc.",
+        platform="Win32",
+        webgl_vendor="Intel Inc.",
+        renderer="Intel Iris OpenGL Engine",
+        fix_hairline=True,
+    )
+    return driver
+
+
+class PooledDriver:
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.pages = 0
+
+    def alive(self) -> bool:
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def quit(self) -> None:
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class ChromeDriverPool:
+    """Bounded, thread-safe pool of reusable Chrome drivers."""
+
+    def __init__(self, size: int = 2, max_pages: int = 25):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle: "queue.LifoQueue[PooledDriver]" = queue.LifoQueue()
+        self._closed = False
+        self.started = 0
+        self.recycled = 0
+        self.borrowed = 0
+        self.total_wait = 0.0
+
+    def _new_driver(self) -> PooledDriver:
+        self.started += 1
+        return PooledDriver(create_driver())
+
+    def _take_idle(self):
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if pooled.alive():
+                return pooled
+            self.recycled += 1
+            pooled.quit()
+
+    def warm(self, count: int = None) -> None:
+        """Start browsers ahead of the first query so it does not pay startup."""
+        count = min(self.size, count or self.size) - self._idle.qsize()
+        for _ in range(max(0, count)):
+            if not self._slots.acquire(blocking=False):
+                return
+            try:
+                self._idle.put(self._new_driver())
+            except Exception as e:
+                print(f"[scholar-pool] Failed to warm browser: {e}")
+                return
+            finally:
+                self._slots.release()
+
+    @contextmanager
+    def driver(self):
+        """Borrow a driver for one query; it goes back to the pool afterwards."""
+        start = time.time()
+        self._slots.acquire()
+        self.total_wait += time.time() - start
+        pooled = None
+        try:
+            pooled = self._take_idle() or self._new_driver()
+            self.borrowed += 1
+            yield pooled.driver
+            pooled.pages += 1
+        except BaseException:
+            # A failed query may leave the browser in a bad state
+            if pooled:
+                self.recycled += 1
+                pooled.quit()
+                pooled = None
+            raise
+        finally:
+            if pooled:
+                if self._closed or pooled.pages >= self.max_pages:
+                    self.recycled += 1
+                    pooled.quit()
+                else:
+                    self._idle.put(pooled)
+            self._slots.release()
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().quit()
+            except queue.Empty:
+                return
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "started": self.started,
+            "recycled": self.recycled,
+            "borrowed": self.borrowed,
+            "avg_wait_seconds": (
+                round(self.total_wait / self.borrowed, 3) if self.borrowed else 0.0
+            ),
+        }
+
+
+scholar_driver_pool = ChromeDriverPool(
+    size=settings.SCHOLAR_BROWSER_POOL_SIZE,
+    max_pages=settings.SCHOLAR_BROWSER_MAX_PAGES,
+)
@@ -1,46 +1,50 @@
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from time import time
 
 from core.models.worklet import Reference
-from pipeline.tools.search import search_tavily as search_tool
+from pipeline.tools.search import WEB_SEARCH_OPTIONS, search_tavily as search_tool
 from core.references.github import get_github_references
-from core.references.google_scholar import get_google_scholar_references
+from core.references.google_scholar import fetch_google_scholar_references
+from core.references.reference_cache import cached_references
 from core.llm.outputs import ReferenceKeywordResult
 
 
-async def generate_references(keywords: ReferenceKeywordResult) -> list[Reference]:
+async def fetch_web_references(keyword: str) -> list[Reference]:
+    # Same options as web_search, so a keyword it already searched is reused
+    tool_results = await search_tool(query=keyword, **WEB_SEARCH_OPTIONS)
 
-    with ThreadPoolExecutor() as executor:
-        loop = asyncio.get_running_loop()
-        github_future = loop.run_in_executor(None, get_github_references, keywords.github_keyword)
-        scholar_future = loop.run_in_executor(
-            None, get_google_scholar_references, keywords.google_scholar_keyword
+    return [
+        Reference(
+            title=r.get("title", ""),
+            link=r.get("url", ""),
+            description=r.get("content", ""),
+            tag="google",
         )
+        for r in tool_results.get("results", [])
+    ]
+
+
+async def generate_references(keywords: ReferenceKeywordResult) -> list[Reference]:
 
-        githubReferences, googleScholarReferences = await asyncio.gather(
-            github_future, scholar_future
+    githubReferences, googleScholarReferences = await asyncio.gather(
+        cached_references(
+            "github",
+            keywords.github_keyword,
+            lambda: get_github_references(keywords.github_keyword),
+        ),
+        cached_references(
+            "scholar",
+            keywords.google_scholar_keyword,
+            lambda: fetch_google_scholar_references(keywords.google_scholar_keyword),
+        ),
+    )
+    webReferences = []
+
+    if len(googleScholarReferences) == 0:
+        webReferences = await cached_references(
+            "tavily",
+            keywords.google_scholar_keyword,
+            lambda: fetch_web_references(keywords.google_scholar_keyword),
         )
-        webReferences = []
-
-        if len(googleScholarReferences) == 0:
-            tool_results = await search_tool(
-                query=keywords.google_scholar_keyword,
-                max_results=10,
-                depth="advanced",
-                include_answer=False,
-                include_favicon=False,
-            )
-
-            for r in tool_results.get("results", []):
-                webReferences.append(
-                    Reference(
-                        title=r.get("title", ""),
-                        link=r.get("url", ""),
-                        description=r.get("content", ""),
-                        tag="google",
-                    )
-                )
 
     response = []
     response.extend(googleScholarReferences)
@@ -1,41 +1,182 @@
-import requests
+import asyncio
 import time
+from collections import OrderedDict
 
+import httpx
+
+from core.config import settings
 from core.models.worklet import Reference
 
+SEARCH_URL = "https://api.github.com/search/repositories"
+MAX_ATTEMPTS = 3
+MAX_RATE_LIMIT_WAIT = 90.0  # Search limits reset every minute
+ETAG_CACHE_SIZE = 256
+
+_http_client: httpx.AsyncClient | None = None
+# (keyword) -> (etag, response json), revalidated with If-None-Match
+_etags: "OrderedDict[str, tuple[str, dict]]" = OrderedDict()
+stats = {"requests": 0, "not_modified": 0, "rate_limited": 0, "failures": 0}
+
+
+class RateLimitBudget:
+    """
+    Shared view of the search API rate limit, updated from the X-RateLimit-*
+    headers of every response. Calls beyond the remaining budget wait for the
+    window to reset instead of failing with a 403. Until a response has told
+    us the budget, only one call is let through at a time.
+    """
+
+    def __init__(self):
+        self.remaining: int | None = None  # Unknown until the first response
+        self.limit: int | None = None
+        self.reset_at = 0.0
+        self.lock = asyncio.Lock()
+        self.probe: asyncio.Future | None = None  # The one call in flight while unknown
+
+    async def reserve(self) -> bool:
+        """Take one call from the budget; True if the caller is the probing call."""
+        while True:
+            async with self.lock:
+                now = time.time()
+                if self.remaining is not None and now >= self.reset_at:
+                    # New window, full budget (or unknown again)
+                    self.remaining = self.limit
+                if self.remaining is not None and self.remaining <= 0:
+                    wait = min(self.reset_at - now, MAX_RATE_LIMIT_WAIT)
+                    print(f"[github] Rate limit exhausted, waiting {wait:.0f}s")
+                    await asyncio.sleep(max(0.0, wait) + 1)
+                    self.remaining = self.limit
+                if self.remaining is not None:
+                    self.remaining -= 1
+                    return False
+                if self.probe is None:
+                    self.probe = asyncio.get_running_loop().create_future()
+                    return True
+                probe = self.probe
+            # Wait for the probing call's response, then look at the budget again
+            await asyncio.shield(probe)
+
+    def update(self, response: httpx.Response) -> None:
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        limit = response.headers.get("X-RateLimit-Limit")
+        if limit is not None:
+            self.limit = int(limit)
+        reset_at = float(reset) if reset is not None else self.reset_at
+        if reset_at < self.reset_at:
+            # Response from an earlier window that arrived late
+            return
+        if remaining is not None:
+            remaining = int(remaining)
+            if reset_at == self.reset_at and self.remaining is not None:
+                # Same window: responses arrive out of order and reserve() has
+                # already counted calls still in flight, never raise the budget
+                remaining = min(remaining, self.remaining)
+            self.remaining = remaining
+        self.reset_at = reset_at
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            self.remaining = 0
+            self.reset_at = time.time() + float(retry_after)
+
+    def release(self) -> None:
+        """Called when the probing call is done; waiters then see the budget it learned."""
+        if self.probe is not None:
+            if not self.probe.done():
+                self.probe.set_result(None)
+            self.probe = None
+
+
+rate_limit = RateLimitBudget()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+        if settings.GITHUB_TOKEN:
+            headers["Authorization"] = f"Bearer {settings.GITHUB_TOKEN}"
+        _http_client = httpx.AsyncClient(
+            headers=headers,
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
-def get_github_references(keyword):
-    url = "https://api.github.com/search/repositories"
+
+def _is_rate_limited(response: httpx.Response) -> bool:
+    return response.status_code == 429 or (
+        response.status_code == 403
+        and (
+            response.headers.get("X-RateLimit-Remaining") == "0"
+            or "Retry-After" in response.headers
+        )
+    )
+
+
+async def search_repositories(keyword) -> dict:
+    """Search API response for the keyword, or {} if GitHub could not be reached."""
     params = {"q": keyword, "per_page": 10}
+    cached = _etags.get(keyword)
 
-    def make_request():
+    for attempt in range(MAX_ATTEMPTS):
+        probing = await rate_limit.reserve()
+        headers = {"If-None-Match": cached[0]} if cached else {}
         try:
-            return requests.get(url, params=params, timeout=10)
-        except requests.RequestException:
-            return None
-
-    # Try a couple of times with a short backoff
-    retries = 2
-    backoff = 1
-    response = None
-    data = {}
-    for attempt in range(retries):
-        response = make_request()
+            response = await get_http_client().get(
+                SEARCH_URL, params=params, headers=headers
+            )
+            rate_limit.update(response)
+        except httpx.HTTPError as e:
+            print(f"[github] Request failed for '{keyword}': {e}")
+            response = None
+        finally:
+            if probing:
+                rate_limit.release()
         if response is None:
-            time.sleep(backoff)
+            await asyncio.sleep(2**attempt)
             continue
+        stats["requests"] += 1
+
+        if response.status_code == 304 and cached:
+            stats["not_modified"] += 1
+            _etags.move_to_end(keyword)
+            return cached[1]
         if response.status_code == 200:
             try:
                 data = response.json()
             except ValueError:
-                data = {}
-            break
-        # not a 200, wait and retry
-        time.sleep(backoff)
+                return {}
+            etag = response.headers.get("ETag")
+            if etag:
+                _etags[keyword] = (etag, data)
+                _etags.move_to_end(keyword)
+                while len(_etags) > ETAG_CACHE_SIZE:
+                    _etags.popitem(last=False)
+            return data
+        if _is_rate_limited(response):
+            # Budget is now exhausted, the next reserve() waits for the reset
+            stats["rate_limited"] += 1
+            continue
+        print(f"[github] Search returned {response.status_code} for '{keyword}'")
+        await asyncio.sleep(2**attempt)
+
+    stats["failures"] += 1
+    return {}
 
-    # If we never got a successful response, return empty list safely
-    if response is None or response.status_code != 200:
-        return []
+
+async def get_github_references(keyword):
+    data = await search_repositories(keyword)
 
     result = []
     for item in data.get("items", []):
@@ -54,6 +195,15 @@ def get_github_references(keyword):
     return result
 
 
+def github_stats() -> dict:
+    return {
+        **stats,
+        "authenticated": bool(settings.GITHUB_TOKEN),
+        "rate_limit_remaining": rate_limit.remaining,
+        "rate_limit_reset_at": rate_limit.reset_at,
+    }
+
+
 def slice_to_100_words(text):
     words = text.split()
     if len(words) <= 100:
@@ -1,11 +1,115 @@
+import asyncio
+
+import httpx
+from selectolax.lexbor import LexborHTMLParser
+
 from core.models.worklet import Reference
 from core.references.scholar_package import CustomGoogleScholarOrganic
+from core.references.driver_pool import scholar_driver_pool
+
+SCHOLAR_URL = "https://scholar.google.com/scholar"
+SCHOLAR_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+# Markers of the CAPTCHA / unusual-traffic / cookie-consent interstitials
+CHALLENGE_MARKERS = (
+    "gs_captcha_ccl",
+    "recaptcha",
+    "unusual traffic",
+    "consent.google.com",
+)
+
+_http_client: httpx.AsyncClient | None = None
+stats = {"http": 0, "browser_fallback": 0}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            headers=SCHOLAR_HEADERS,
+            follow_redirects=True,
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def is_challenge(response: httpx.Response) -> bool:
+    if response.status_code in (403, 429, 503):
+        return True
+    url = str(response.url)
+    if "/sorry/" in url or "consent." in url:
+        return True
+    html = response.text.lower()
+    return any(marker in html for marker in CHALLENGE_MARKERS)
+
+
+def format_references(organic_results) -> list[Reference]:
+    result = []
+    for i in organic_results:
+        title = i.get("title", "") or ""
+        title = title.replace("[PDF]", "").replace("[HTML]", "").replace("[DOC]", "")
+        description = i.get("snippet", "")
+        if description:
+            description = slice_to_100_words(description)
+        else:
+            description = "Did not find any description for this paper just sort them as you see fit try to keep one with tag scholar in front"
+        result.append(
+            Reference(
+                title=title,
+                link=i.get("title_link", ""),
+                description=description,
+                tag="scholar",
+            )
+        )
+    return result
+
+
+async def fetch_google_scholar_references(keyword) -> list[Reference]:
+    """
+    Fetches Google Scholar references for the keyword over plain HTTP and parses
+    the results page with Lexbor. Only when Scholar answers with a CAPTCHA or
+    consent page (or the request fails) does it fall back to the pooled
+    Selenium browsers in get_google_scholar_references.
+    """
+    try:
+        response = await get_http_client().get(
+            SCHOLAR_URL, params={"q": keyword, "hl": "en", "gl": "us", "start": 0}
+        )
+        if not is_challenge(response):
+            organic_results = []
+            CustomGoogleScholarOrganic().parse(
+                parser=LexborHTMLParser(response.text),
+                organic_results_data=organic_results,
+            )
+            stats["http"] += 1
+            return format_references(organic_results)
+        print(f"Google Scholar challenge for '{keyword}', falling back to browser")
+    except Exception as e:
+        print(f"Google Scholar HTTP fetch failed for '{keyword}': {e}")
+
+    stats["browser_fallback"] += 1
+    return await asyncio.to_thread(get_google_scholar_references, keyword)
 
 
 def get_google_scholar_references(keyword):
     """
     Fetches references from Google Scholar based on the provided keyword.
-    This function uses a custom parser to scrape organic results from Google Scholar.
+    This function drives a pooled headless browser to scrape organic results from Google Scholar,
+    and is the fallback of fetch_google_scholar_references.
     It processes the results to extract the title, link, and description of each paper,
     and formats them into a structured list of dictionaries.
     Args:
@@ -25,32 +129,18 @@ def get_google_scholar_references(keyword):
     try:
         custom_parser_get_organic_results = (
             CustomGoogleScholarOrganic().scrape_google_scholar_organic_results(
-                query=keyword, pagination=False, save_to_csv=False, save_to_json=False
+                query=keyword,
+                pagination=False,
+                save_to_csv=False,
+                save_to_json=False,
+                driver_pool=scholar_driver_pool,
             )
         )
 
-        result = []
-        for i in custom_parser_get_organic_results:
-            title = i.get("title", "")
-            title = (
-                title.replace("[PDF]", "").replace("[HTML]", "").replace("[DOC]", "")
-            )
-            description = i.get("snippet", "")
-            if description:
-                description = slice_to_100_words(description)
-            else:
-                description = "Did not find any description for this paper just sort them as you see fit try to keep one with tag scholar in front"
-            result.append(
-                Reference(
-                    title=title,
-                    link=i.get("title_link", ""),
-                    description=description,
-                    tag="scholar",
-                )
-            )
-        return result
+        return format_references(custom_parser_get_organic_results)
 
     except Exception as e:
+        print(f"Google Scholar lookup failed for '{keyword}': {e}")
         return []
 
 
@@ -0,0 +1,199 @@
+"""
+Persistent cache of reference lookups (GitHub, Google Scholar, Tavily).
+
+Entries are keyed on (source, normalized keyword) and hold the list of
+references returned by the source. The backend is chosen with
+REFERENCE_CACHE_BACKEND ("none", "sqlite" or "mongo"). Entries younger than
+REFERENCE_CACHE_TTL are served as-is; older ones are served stale while a
+background refresh runs, until they pass REFERENCE_CACHE_STALE_TTL and are
+fetched again inline. Empty results are not cached, since the sources also
+return an empty list when a lookup fails.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from core.config import settings
+from core.models.worklet import Reference
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join((keyword or "").lower().split())
+
+
+def cache_key(source: str, keyword: str) -> str:
+    return f"{source}:{normalize_keyword(keyword)}"
+
+
+class SqliteReferenceCache:
+    """Single-table SQLite store, shared across executor threads."""
+
+    def __init__(self, path: str, max_age: int):
+        self.max_age = max_age
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS reference_cache ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[Tuple[list, float]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload, fetched_at FROM reference_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.max_age:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, key: str, payload: list) -> None:
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO reference_cache (key, payload, fetched_at) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps(payload), now),
+            )
+            self.conn.execute(
+                "DELETE FROM reference_cache WHERE fetched_at < ?",
+                (now - self.max_age,),
+            )
+
+
+class MongoReferenceCache:
+    """Entries in the `reference_cache` collection, expired by a TTL index."""
+
+    def __init__(self, max_age: int):
+        from core.database import db
+
+        self.collection = db.reference_cache
+        self.max_age = max_age
+        try:
+            self.collection.create_index("fetched_at", expireAfterSeconds=max_age)
+        except Exception as exc:
+            print(f"Warning: failed creating indexes on 'reference_cache': {exc}")
+
+    def get(self, key: str) -> Optional[Tuple[list, float]]:
+        entry = self.collection.find_one(
+            {
+                "_id": key,
+                "fetched_at": {"$gte": datetime.now() - timedelta(seconds=self.max_age)},
+            }
+        )
+        if not entry:
+            return None
+        return entry["references"], entry["fetched_at"].timestamp()
+
+    def put(self, key: str, payload: list) -> None:
+        self.collection.replace_one(
+            {"_id": key},
+            {"references": payload, "fetched_at": datetime.now()},
+            upsert=True,
+        )
+
+
+def _build_cache():
+    backend = (settings.REFERENCE_CACHE_BACKEND or "none").lower()
+    if backend == "sqlite":
+        return SqliteReferenceCache(
+            settings.REFERENCE_CACHE_PATH, settings.REFERENCE_CACHE_STALE_TTL
+        )
+    if backend == "mongo":
+        return MongoReferenceCache(settings.REFERENCE_CACHE_STALE_TTL)
+    return None
+
+
+_cache = _build_cache()
+_refreshing: Dict[str, asyncio.Task] = {}
+stats: Dict[str, Dict[str, int]] = {}
+
+
+def _count(source: str, outcome: str) -> None:
+    source_stats = stats.setdefault(
+        source, {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+    )
+    source_stats[outcome] += 1
+
+
+async def _fetch_and_store(
+    key: str, fetch: Callable[[], Awaitable[List[Reference]]]
+) -> List[Reference]:
+    references = await fetch()
+    if references:
+        try:
+            await asyncio.to_thread(
+                _cache.put, key, [r.model_dump() for r in references]
+            )
+        except Exception as e:
+            print(f"[reference-cache] store failed for {key}: {e}")
+    return references
+
+
+def _refresh_in_background(
+    key: str, source: str, fetch: Callable[[], Awaitable[List[Reference]]]
+) -> None:
+    if key in _refreshing:
+        return
+    _count(source, "refreshes")
+
+    async def refresh():
+        try:
+            await _fetch_and_store(key, fetch)
+        except Exception as e:
+            print(f"[reference-cache] refresh failed for {key}: {e}")
+        finally:
+            _refreshing.pop(key, None)
+
+    _refreshing[key] = asyncio.create_task(refresh())
+
+
+async def cached_references(
+    source: str, keyword: str, fetch: Callable[[], Awaitable[List[Reference]]]
+) -> List[Reference]:
+    """Return the references for (source, keyword), calling fetch() on a miss."""
+    if _cache is None:
+        return await fetch()
+
+    key = cache_key(source, keyword)
+    try:
+        entry = await asyncio.to_thread(_cache.get, key)
+    except Exception as e:
+        print(f"[reference-cache] lookup failed for {key}: {e}")
+        entry = None
+
+    if entry is None:
+        _count(source, "misses")
+        return await _fetch_and_store(key, fetch)
+
+    payload, fetched_at = entry
+    if time.time() - fetched_at > settings.REFERENCE_CACHE_TTL:
+        _count(source, "stale_hits")
+        _refresh_in_background(key, source, fetch)
+    else:
+        _count(source, "hits")
+    return [Reference(**r) for r in payload]
+
+
+def cache_stats() -> dict:
+    by_source = {}
+    for source, counts in stats.items():
+        lookups = counts["hits"] + counts["stale_hits"] + counts["misses"]
+        by_source[source] = {
+            **counts,
+            "hit_rate": (
+                round((counts["hits"] + counts["stale_hits"]) / lookups, 3)
+                if lookups
+                else 0.0
+            ),
+        }
+    return {"backend": settings.REFERENCE_CACHE_BACKEND, "sources": by_source}
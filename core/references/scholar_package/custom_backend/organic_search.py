@@ -74,7 +74,8 @@ class CustomGoogleScholarOrganic:
             query: str,
             pagination: bool = False,
             save_to_csv: bool = False, 
-            save_to_json: bool = False
+            save_to_json: bool = False,
+            driver_pool=None
         ) -> List[Dict[str, str]]:
         '''
         Extracts data from Google Scholar Organic resutls page:
@@ -91,6 +92,8 @@ class CustomGoogleScholarOrganic:
         - pagination: bool. Enables or disables pagination. Default is False.
         - save_to_csv: bool. True of False. Default is False.
         - save_to_json: bool. True of False. Default is False.
+        - driver_pool: optional pool exposing a `driver()` context manager. When given, a warm
+          browser is borrowed from it instead of starting a new one for this query.
         
         Usage:
         
@@ -108,27 +111,50 @@ class CustomGoogleScholarOrganic:
             print(organic_result['pdf_file'])
         '''
         
-        # selenium stealth
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless=new')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        
-        options.add_experimental_option('excludeSwitches', ['enable-automation', 'enable-logging'])
-        options.add_experimental_option('useAutomationExtension', False) 
-        
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        stealth(driver,
-            languages=['en-US', 'en'],
-            vendor='Google Inc.',
-            platform='Win32',
-            webgl_vendor='Intel Inc.',
-            renderer='Intel Iris OpenGL Engine',
-            fix_hairline=True,
-        )
+        if driver_pool is not None:
+            # warm browser from the shared pool, returned (or recycled) afterwards
+            with driver_pool.driver() as driver:
+                organic_results_data = self.scrape_pages(driver=driver, query=query, pagination=pagination)
+        else:
+            # selenium stealth
+            options = webdriver.ChromeOptions()
+            options.add_argument('--headless=new')
+            options.add_argument('--no-sandbox')
+            options.add_argument('--disable-dev-shm-usage')
+            
+            options.add_experimental_option('excludeSwitches', ['enable-automation', 'enable-logging'])
+            options.add_experimental_option('useAutomationExtension', False) 
+            
+            service = Service(ChromeDriverManager().install())
+            driver = webdriver.Chrome(service=service, options=options)
+            
+            stealth(driver,
+                languages=['en-US', 'en'],
+                vendor='Google Inc.',
+                platform='Win32',
+                webgl_vendor='Intel Inc.',
+                renderer='Intel Iris OpenGL Engine',
+                fix_hairline=True,
+            )
+            try:
+                organic_results_data = self.scrape_pages(driver=driver, query=query, pagination=pagination)
+            finally:
+                driver.quit()
+            
+        if save_to_csv:
+            pd.DataFrame(data=organic_results_data).to_csv('google_scholar_organic_results_data.csv', 
+                                                            index=False, encoding='utf-8')
+        if save_to_json:
+            pd.DataFrame(data=organic_results_data).to_json('google_scholar_organic_results_data.json', 
+                                                            orient='records')
         
+        return organic_results_data
+
+    def scrape_pages(self, driver, query: str, pagination: bool = False) -> List[Dict[str, str]]:
+        '''
+        Loads Google Scholar Organic results pages in `driver` and parses them.
+        The driver is left open so it can be reused.
+        '''
         page_num = 0
         organic_results_data = []
     
@@ -153,13 +179,5 @@ class CustomGoogleScholarOrganic:
             parser = LexborHTMLParser(driver.page_source)
         
             self.parse(parser=parser, organic_results_data=organic_results_data)
-            
-        if save_to_csv:
-            pd.DataFrame(data=organic_results_data).to_csv('google_scholar_organic_results_data.csv', 
-                                                            index=False, encoding='utf-8')
-        if save_to_json:
-            pd.DataFrame(data=organic_results_data).to_json('google_scholar_organic_results_data.json', 
-                                                            orient='records')
-        driver.quit()
         
         return organic_results_data
@@ -1,232 +1,137 @@
 from typing import List
 
 from core.models.worklet import Reference
-from core.utils.count_tokens import count_tokens
+from core.models.document import Documents
+from core.utils.count_tokens import (
+    count_tokens,
+    count_tokens_many,
+    decode_tokens,
+)
 from pipeline.state import AgentState
 
-
-def compress_main_prompt(
-    state: AgentState,
-    max_tokens: int = 4000,
-    prompt_offset=750,
-    pass_limit: int = 5,
-    verbose: bool = True,
-) -> AgentState:
-    """
-    Compresses parsed_data (previous projects), links_data, and web_search_results
-    so that total tokens (including prompt, keywords, and domains) fit within 4k context.
-
-    Priority: parsed_data (3) > links_data (2) > web_search_results (1)
-    Automatically increases trim aggressiveness if still over budget.
-    """
-    max_tokens -= prompt_offset  # Reserve space for prompt
-    if max_tokens <= 0:
-        raise ValueError("max_tokens must be greater than prompt_offset")
-
-    # --- Early check: if already fits, return unchanged ---
-    total_tokens_initial = (
-        count_tokens(state.custom_prompt or "")
-        + sum(
-            count_tokens(d.full_text)
-            for d in (getattr(state.parsed_data, "documents", []) or [])
-        )
-        + sum(count_tokens(str(l)) for l in (state.links_data or []))
-        + sum(count_tokens(str(w)) for w in (state.web_search_results or []))
-        + count_tokens(
-            " ".join(state.keywords_domains.keywords if state.keywords_domains else [])
-        )
-        + count_tokens(
-            " ".join(state.keywords_domains.domains if state.keywords_domains else [])
+ELLIPSIS = " ... "
+# Tokens reserved per trimmed item: decoding a cut token sequence and joining
+# head + tail can merge or split a couple of tokens at the seams.
+SEAM_SLACK = 4
+
+
+def link_text(link) -> str:
+    """Build a safe string representation for a link; guard against None values and unexpected types"""
+    if isinstance(link, str):
+        return link
+    if isinstance(link, dict):
+        # For dict-like links, join known fields, skipping falsy parts and casting to str
+        return " ".join(
+            str(part)
+            for part in (link.get("title"), link.get("content"), link.get("url"))
+            if part
         )
-    )
-
-    if total_tokens_initial <= max_tokens:
-        if verbose:
-            print(
-                f"Content already fits within {max_tokens} tokens ({total_tokens_initial}). No compression needed."
-            )
-        return state
-
-    def trim_text(text: str, budget: int, aggressiveness: float) -> str:
-        """Deterministic compressor: keep start + end, drop middle."""
-        tokens = count_tokens(text)
-        if tokens <= budget:
-            return text
-        head_tokens = int(budget * aggressiveness)
-        tail_tokens = max(1, budget - head_tokens)
-        words = text.split()
-        if len(words) < 10:
-            return " ".join(words[:budget])
-        return " ".join(words[:head_tokens]) + " ... " + " ".join(words[-tail_tokens:])
+    return "" if link is None else str(link)
 
-    def compress_list_texts(
-        texts: List[str], total_budget: int, aggressiveness: float
-    ) -> List[str]:
-        """Distribute budget equally and compress each deterministically."""
-        if not texts:
-            return []
-        per_item_budget = max(1, total_budget // len(texts))
-        return [trim_text(t, per_item_budget, aggressiveness) for t in texts]
 
-    def compress_pass(state: AgentState, aggressiveness: float) -> AgentState:
-        """One compression pass with fixed aggressiveness."""
-        # --- Step 1: Base prompt tokens ---
-        base_prompt_tokens = count_tokens(
-            (state.custom_prompt or "")
-            + " ".join(
-                state.keywords_domains.keywords if state.keywords_domains else []
-            )
-            + " ".join(state.keywords_domains.domains if state.keywords_domains else [])
-        )
-        remaining_budget = max_tokens - base_prompt_tokens
-        if remaining_budget <= 0:
-            if verbose:
-                print("Base prompt exceeds max tokens. Truncating custom prompt.")
-            state.custom_prompt = (state.custom_prompt or "")[: int(max_tokens * 0.5)]
-            return state
+def web_text(result: dict) -> str:
+    return (
+        "Query: "
+        + result.get("query", "")
+        + " | "
+        + " ".join(res.get("content", "") for res in (result.get("results") or []))
+    )
 
-        projects = getattr(state.parsed_data, "documents", []) or []
-        links = state.links_data or []
-        web_results = state.web_search_results or []
 
-        # --- Step 2: Token counts ---
-        total_proj_tokens = sum(count_tokens(doc.full_text) for doc in projects)
-        total_link_tokens = sum(count_tokens(str(link)) for link in links)
-        total_web_tokens = sum(
-            count_tokens(
-                " ".join(
-                    [r.get("query", "")]
-                    + [res.get("content", "") for res in r.get("results", [])]
-                )
-            )
-            for r in web_results
-        )
+def _allocate(lengths: List[int], budget: int) -> List[int]:
+    """
+    Split a token budget across items. Items shorter than their equal share
+    keep their full length and the surplus is handed to the longer ones.
+    """
+    allocation = [0] * len(lengths)
+    remaining = max(0, budget)
+    pending = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    while pending:
+        share = remaining // len(pending)
+        idx = pending.pop(0)
+        allocation[idx] = min(lengths[idx], share)
+        remaining -= allocation[idx]
+    return allocation
+
+
+def _trim_tokens(tokens: List[int], budget: int, aggressiveness: float) -> str:
+    """Keep the first/last tokens of an encoded text so it fits the budget."""
+    if len(tokens) <= budget:
+        return decode_tokens(tokens)
+    budget = max(0, budget - SEAM_SLACK - count_tokens(ELLIPSIS))
+    if budget == 0:
+        return ""
+    head_tokens = max(1, int(budget * aggressiveness))
+    tail_tokens = budget - head_tokens
+    if tail_tokens == 0:
+        return decode_tokens(tokens[:head_tokens])
+    return (
+        decode_tokens(tokens[:head_tokens])
+        + ELLIPSIS
+        + decode_tokens(tokens[-tail_tokens:])
+    )
 
-        total_dynamic = total_proj_tokens + total_link_tokens + total_web_tokens
-        if total_dynamic == 0:
-            return state
 
-        # --- Step 3: Weighted allocation (3:2:1 ratio) ---
-        ratio = {"proj": 3, "links": 2, "web": 1}
-        active_ratio_sum = (
-            (ratio["proj"] if total_proj_tokens else 0)
-            + (ratio["links"] if total_link_tokens else 0)
-            + (ratio["web"] if total_web_tokens else 0)
-        )
-        proj_budget = (
-            int(remaining_budget * (ratio["proj"] / active_ratio_sum))
-            if total_proj_tokens
-            else 0
+def split_budgets(totals: dict, remaining_budget: int) -> dict:
+    """Weighted 3:2:1 allocation between proj/links/web token totals."""
+    ratio = {"proj": 3, "links": 2, "web": 1}
+    active_ratio_sum = sum(ratio[k] for k in ratio if totals[k])
+    budgets = {
+        k: int(remaining_budget * ratio[k] / active_ratio_sum) if totals[k] else 0
+        for k in ratio
+    }
+    # Hand budget a section does not need to the next lower-priority sections
+    surplus = 0
+    for k in ("proj", "links", "web"):
+        budgets[k] += surplus
+        surplus = max(0, budgets[k] - totals[k])
+        budgets[k] -= surplus
+    if surplus:
+        for k in ("proj", "links", "web"):
+            extra = min(surplus, totals[k] - budgets[k])
+            budgets[k] += extra
+            surplus -= extra
+    return budgets
+
+
+def compress_section(
+    encoded: List[List[int]], budget: int, aggressiveness: float
+) -> List[str]:
+    allocation = _allocate([len(t) for t in encoded], budget)
+    return [
+        _trim_tokens(tokens, alloc, aggressiveness)
+        for tokens, alloc in zip(encoded, allocation)
+    ]
+
+
+def count_base_prompt_tokens(state: AgentState) -> int:
+    keywords = state.keywords_domains.keywords if state.keywords_domains else []
+    domains = state.keywords_domains.domains if state.keywords_domains else []
+    return sum(
+        count_tokens_many(
+            [state.custom_prompt or "", " ".join(keywords), " ".join(domains)]
         )
-        link_budget = (
-            int(remaining_budget * (ratio["links"] / active_ratio_sum))
-            if total_link_tokens
-            else 0
-        )
-        web_budget = (
-            int(remaining_budget * (ratio["web"] / active_ratio_sum))
-            if total_web_tokens
-            else 0
-        )
-
-        # --- Step 4: Compress content ---
-        project_texts = [doc.full_text for doc in projects]
-        compressed_projects = compress_list_texts(
-            project_texts, proj_budget, aggressiveness
-        )
-
-        # Build safe string representations for links; guard against None values and unexpected types
-        link_texts = [
-            (
-                link
-                if isinstance(link, str)
-                else (
-                    # For dict-like links, join known fields, skipping falsy parts and casting to str
-                    " ".join(
-                        str(part)
-                        for part in (
-                            link.get("title"),
-                            link.get("content"),
-                            link.get("url"),
-                        )
-                        if part
-                    )
-                    if isinstance(link, dict)
-                    else ("" if link is None else str(link))
-                )
-            )
-            for link in links
-        ]
-
-        compressed_links = compress_list_texts(link_texts, link_budget, aggressiveness)
-
-        web_texts = [
-            "Query: "
-            + r.get("query", "")
-            + " | "
-            + " ".join(res.get("content", "") for res in r.get("results", []))
-            for r in web_results
-        ]
-        compressed_web = compress_list_texts(web_texts, web_budget, aggressiveness)
+    )
 
-        if projects:
-            for i, doc in enumerate(projects):
-                if i < len(compressed_projects):
-                    doc.full_text = compressed_projects[i]
-        state.links_data = compressed_links
-        state.web_search_results = [
-            {"query": web_results[i].get("query", ""), "content": compressed_web[i]}
-            for i in range(min(len(web_results), len(compressed_web)))
-        ]
-        return state
 
-    # --- Step 5: Adaptive loop ---
-    aggressiveness = 0.7
-    passes = 0
-    while passes < pass_limit:
-        state = compress_pass(state, aggressiveness)
-        total_tokens_after = (
-            count_tokens(state.custom_prompt or "")
-            + sum(
-                count_tokens(d.full_text)
-                for d in (getattr(state.parsed_data, "documents", []) or [])
-            )
-            + sum(count_tokens(str(l)) for l in (state.links_data or []))
-            + sum(count_tokens(str(w)) for w in (state.web_search_results or []))
-            + count_tokens(
-                " ".join(
-                    state.keywords_domains.keywords if state.keywords_domains else []
-                )
-            )
-            + count_tokens(
-                " ".join(
-                    state.keywords_domains.domains if state.keywords_domains else []
-                )
-            )
+def apply_sections(state: AgentState, compressed: dict) -> AgentState:
+    """Write compressed proj/links/web texts back onto the state."""
+    projects = getattr(state.parsed_data, "documents", []) or []
+    web_results = state.web_search_results or []
+    if projects:
+        # Replace documents rather than mutating them, the caller's state may share them
+        state.parsed_data = Documents(
+            documents=[
+                doc.model_copy(update={"full_text": text})
+                for doc, text in zip(projects, compressed["proj"])
+            ],
+            thread_id=state.parsed_data.thread_id,
         )
-
-        if verbose:
-            print(
-                f"Pass {passes+1}: {total_tokens_after}/{max_tokens} tokens (aggr={aggressiveness:.2f})"
-            )
-
-        if total_tokens_after <= max_tokens:
-            if verbose:
-                print(
-                    f"Compression complete within {passes+1} passes ({total_tokens_after} tokens)"
-                )
-            break
-
-        # If still over budget → increase aggressiveness (cut more)
-        aggressiveness = max(0.3, aggressiveness - 0.1)
-        passes += 1
-
-    if passes == pass_limit and total_tokens_after > max_tokens:
-        if verbose:
-            print(
-                f"Even after {pass_limit} passes, still over budget ({total_tokens_after})."
-            )
-
+    state.links_data = compressed["links"]
+    state.web_search_results = [
+        {"query": r.get("query", ""), "content": text}
+        for r, text in zip(web_results, compressed["web"])
+    ]
     return state
 
 
@@ -261,8 +166,9 @@ def compress_references(
 
     # --- Step 1: Initial full token count ---
     total_tokens = sum(
-        count_tokens(ref.title) + count_tokens(ref.tag) + count_tokens(ref.description)
-        for ref in references
+        count_tokens_many(
+            text for ref in references for text in (ref.title, ref.tag, ref.description)
+        )
     )
 
     if total_tokens <= max_tokens:
@@ -295,10 +201,11 @@ def compress_references(
 
         # Check total tokens
         total_tokens_after = sum(
-            count_tokens(ref.title)
-            + count_tokens(ref.tag)
-            + count_tokens(ref.description)
-            for ref in compressed_refs
+            count_tokens_many(
+                text
+                for ref in compressed_refs
+                for text in (ref.title, ref.tag, ref.description)
+            )
         )
         if verbose:
             print(
@@ -320,10 +227,11 @@ def compress_references(
             while total_tokens_after > max_tokens and len(compressed_refs) > 0:
                 compressed_refs.pop()
                 total_tokens_after = sum(
-                    count_tokens(ref.title)
-                    + count_tokens(ref.tag)
-                    + count_tokens(ref.description)
-                    for ref in compressed_refs
+                    count_tokens_many(
+                        text
+                        for ref in compressed_refs
+                        for text in (ref.title, ref.tag, ref.description)
+                    )
                 )
             break
 
@@ -0,0 +1,165 @@
+"""
+Per-thread cache of the compressed prompt context.
+
+The extraction, web-search-query and worklet prompts of a thread are all built
+from the same parsed documents and links and only differ in the space reserved
+for the prompt template. Token arrays are kept per section and thread, and
+compressed sections are memoized by (fingerprint, budget), so later graph nodes
+only recompute the sections whose input or budget changed (e.g. once web search
+results arrive).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from core.utils.compress_prompt import (
+    apply_sections,
+    compress_section,
+    count_base_prompt_tokens,
+    link_text,
+    split_budgets,
+    web_text,
+)
+from core.utils.count_tokens import encode_tokens
+from pipeline.state import AgentState
+
+MAX_CACHED_THREADS = 32
+MAX_COMPRESSED_PER_THREAD = 16
+AGGRESSIVENESS = 0.7
+
+
+def _fingerprint(texts: List[str]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for text in texts:
+        data = text.encode("utf-8", "surrogatepass")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ThreadContext:
+    """Encoded and compressed prompt sections for a single thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # section -> (fingerprint, token arrays)
+        self.encoded: Dict[str, Tuple[str, List[List[int]]]] = {}
+        # (section, fingerprint, budget) -> compressed texts
+        self.compressed: "OrderedDict[Tuple[str, str, int], List[str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, section: str, texts: List[str]) -> Tuple[str, List[List[int]]]:
+        fingerprint = _fingerprint(texts)
+        cached = self.encoded.get(section)
+        if cached and cached[0] == fingerprint:
+            return cached
+        entry = (fingerprint, [encode_tokens(text) for text in texts])
+        self.encoded[section] = entry
+        return entry
+
+    def compress(
+        self, section: str, fingerprint: str, encoded: List[List[int]], budget: int
+    ) -> List[str]:
+        key = (section, fingerprint, budget)
+        cached = self.compressed.get(key)
+        if cached is not None:
+            self.hits += 1
+            self.compressed.move_to_end(key)
+            return cached
+        self.misses += 1
+        result = compress_section(encoded, budget, AGGRESSIVENESS)
+        self.compressed[key] = result
+        while len(self.compressed) > MAX_COMPRESSED_PER_THREAD:
+            self.compressed.popitem(last=False)
+        return result
+
+
+_contexts: "OrderedDict[str, ThreadContext]" = OrderedDict()
+_contexts_lock = threading.Lock()
+
+
+def _get_thread_context(thread_id: str) -> ThreadContext:
+    with _contexts_lock:
+        context = _contexts.get(thread_id)
+        if context is None:
+            context = ThreadContext()
+            _contexts[thread_id] = context
+        _contexts.move_to_end(thread_id)
+        while len(_contexts) > MAX_CACHED_THREADS:
+            _contexts.popitem(last=False)
+        return context
+
+
+def clear_thread_context(thread_id: str) -> None:
+    with _contexts_lock:
+        _contexts.pop(thread_id, None)
+
+
+def get_compressed_context(
+    state: AgentState,
+    max_tokens: int = 4000,
+    prompt_offset: int = 750,
+    verbose: bool = True,
+) -> AgentState:
+    """
+    Return a copy of the state whose documents, links and web search results
+    fit within max_tokens - prompt_offset. The input state is left untouched.
+    """
+    budget = max_tokens - prompt_offset  # Reserve space for prompt
+    if budget <= 0:
+        raise ValueError("max_tokens must be greater than prompt_offset")
+
+    modified_state = state.model_copy()
+    context = _get_thread_context(state.thread_id)
+
+    texts = {
+        "proj": [
+            doc.full_text
+            for doc in (getattr(state.parsed_data, "documents", []) or [])
+        ],
+        "links": [link_text(link) for link in (state.links_data or [])],
+        "web": [web_text(r) for r in (state.web_search_results or [])],
+    }
+
+    with context.lock:
+        encoded = {section: context.encode(section, t) for section, t in texts.items()}
+        totals = {
+            section: sum(len(tokens) for tokens in arrays)
+            for section, (_, arrays) in encoded.items()
+        }
+        base_prompt_tokens = count_base_prompt_tokens(state)
+
+        total_tokens = base_prompt_tokens + sum(totals.values())
+        if total_tokens <= budget:
+            if verbose:
+                print(
+                    f"Content already fits within {budget} tokens ({total_tokens}). No compression needed."
+                )
+            return modified_state
+
+        remaining_budget = budget - base_prompt_tokens
+        if remaining_budget <= 0:
+            if verbose:
+                print("Base prompt exceeds max tokens. Truncating custom prompt.")
+            modified_state.custom_prompt = (state.custom_prompt or "")[
+                : int(budget * 0.5)
+            ]
+            return modified_state
+
+        budgets = split_budgets(totals, remaining_budget)
+        compressed = {
+            section: context.compress(section, fingerprint, arrays, budgets[section])
+            for section, (fingerprint, arrays) in encoded.items()
+        }
+        hits, misses = context.hits, context.misses
+
+    apply_sections(modified_state, {k: list(v) for k, v in compressed.items()})
+    if verbose:
+        print(
+            f"Compressed context for thread {state.thread_id} to {budget} tokens "
+            f"(section cache hits={hits}, misses={misses})"
+        )
+    return modified_state
@@ -1,3 +1,9 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, List
+
 import tiktoken
 from core.constants import GPU_MODEL
 
@@ -9,7 +15,87 @@ map = {
     "gpt-oss:20b-50k-8k": "o200k_harmony",
 }
 
+TOKEN_CACHE_SIZE = 4096  # Number of distinct texts whose token count is remembered
+
+_token_cache: "OrderedDict[str, int]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: str = GPU_MODEL) -> tiktoken.Encoding:
+    """Return the process-wide tiktoken encoder for the given model."""
+    return tiktoken.get_encoding(map.get(model, "o200k_harmony"))
+
+
+def _cache_key(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def _cache_get(key: str):
+    with _token_cache_lock:
+        value = _token_cache.get(key)
+        if value is not None:
+            _token_cache.move_to_end(key)
+        return value
+
+
+def _cache_put(key: str, value: int) -> None:
+    with _token_cache_lock:
+        _token_cache[key] = value
+        _token_cache.move_to_end(key)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+
+def encode_tokens(text: str) -> List[int]:
+    """Encode text with the cached encoder and record its token count."""
+    tokens = get_encoder().encode(text or "")
+    _cache_put(_cache_key(text or ""), len(tokens))
+    return tokens
+
+
+def decode_tokens(tokens: List[int]) -> str:
+    return get_encoder().decode(tokens)
+
 
 def count_tokens(text: str) -> int:
-    encoding = tiktoken.get_encoding(map.get(GPU_MODEL, "o200k_harmony"))
-    return len(encoding.encode(text))
+    text = text or ""
+    key = _cache_key(text)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    value = len(get_encoder().encode(text))
+    _cache_put(key, value)
+    return value
+
+
+def count_tokens_many(texts: Iterable[str]) -> List[int]:
+    """
+    Count tokens for several texts at once.
+    Cached counts are reused; the remaining texts are encoded in a single
+    batch call to the encoder.
+    """
+    texts = [t or "" for t in texts]
+    keys = [_cache_key(t) for t in texts]
+    counts: List[int] = [0] * len(texts)
+
+    missing: List[int] = []
+    for idx, key in enumerate(keys):
+        cached = _cache_get(key)
+        if cached is None:
+            missing.append(idx)
+        else:
+            counts[idx] = cached
+
+    if missing:
+        encoded = get_encoder().encode_batch([texts[i] for i in missing])
+        for idx, tokens in zip(missing, encoded):
+            counts[idx] = len(tokens)
+            _cache_put(keys[idx], counts[idx])
+
+    return counts
+
+
+def clear_token_cache() -> None:
+    with _token_cache_lock:
+        _token_cache.clear()
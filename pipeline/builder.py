@@ -31,7 +31,13 @@ graph_builder.add_edge(PROCESS_INPUT, EXTRACT_KEYWORDS_DOMAINS)
 graph_builder.add_edge(EXTRACT_KEYWORDS_DOMAINS, GENERATE_WEB_SEARCH_QUERIES)
 graph_builder.add_edge(GENERATE_WEB_SEARCH_QUERIES, WEB_SEARCH)
 graph_builder.add_edge(WEB_SEARCH, GENERATE_WORKLETS)
-graph_builder.add_edge(GENERATE_WORKLETS, REFERENCES)
+# In streaming mode generate_worklets already carried every worklet through
+# references, ranking and file generation
+graph_builder.add_conditional_edges(
+    GENERATE_WORKLETS,
+    lambda state: GENERATE_FILES if state.pipelined else REFERENCES,
+    [REFERENCES, GENERATE_FILES],
+)
 graph_builder.add_edge(REFERENCES, RANK_REFERENCES)
 graph_builder.add_edge(RANK_REFERENCES, GENERATE_FILES)
 graph_builder.add_edge(GENERATE_FILES, END)
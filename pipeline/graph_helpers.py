@@ -3,17 +3,26 @@ from core.llm.prompts.main_prompt import worklet_generation_prompt
 from core.llm.prompts.reference_ranking_prompt import reference_ranking_prompt
 from core.llm.prompts.web_search_prompt import web_search_query_planner_prompt
 import asyncio
-from core.utils.compress_prompt import compress_main_prompt, compress_references
-from core.constants import MAX_TOKENS
+import math
+import re
+from difflib import SequenceMatcher
+from core.utils.compress_prompt import compress_references
+from core.utils.context_cache import get_compressed_context
+from core.constants import MAX_TOKENS, WORKLETS_PER_SHARD
 
 from pipeline.state import AgentState
-from pipeline.tools.search import search_tavily as search_tool
+from pipeline.tools.search import (
+    WEB_SEARCH_OPTIONS,
+    dedupe_results,
+    search_tavily as search_tool,
+)
 from core.models.worklet import Worklet
 
 
 async def parallel_search(queries):
-    tasks = [search_tool(query, include_favicon=False) for query in queries]
-    search_results = await asyncio.gather(*tasks)
+    tasks = [search_tool(query, **WEB_SEARCH_OPTIONS) for query in queries]
+    # Same URL returned for several queries only reaches the prompt once
+    search_results = dedupe_results(await asyncio.gather(*tasks))
 
     cleaned_results = []
     for idx, query in enumerate(queries):
@@ -44,12 +53,13 @@ async def parallel_search(queries):
     return cleaned_results
 
 
-def build_main_prompt(state: AgentState) -> list:
-    modified_state: AgentState = compress_main_prompt(
-        state.model_copy(),
+def build_main_prompt(
+    state: AgentState, count: int | None = None, seed_themes: list | None = None
+) -> list:
+    modified_state: AgentState = get_compressed_context(
+        state,
         max_tokens=MAX_TOKENS,
         prompt_offset=1100,
-        pass_limit=10,
         verbose=True,
     )
     worklet_data = (
@@ -64,7 +74,8 @@ def build_main_prompt(state: AgentState) -> list:
         else []
     )
     return worklet_generation_prompt(
-        count=modified_state.count,
+        count=count or modified_state.count,
+        seed_themes=seed_themes,
         keywords=(
             modified_state.keywords_domains.keywords
             if modified_state.keywords_domains
@@ -82,12 +93,63 @@ def build_main_prompt(state: AgentState) -> list:
     )
 
 
+def plan_worklet_shards(state: AgentState, sharded: bool = True) -> list:
+    """
+    Split state.count into (count, seed_themes) sub-requests of at most
+    WORKLETS_PER_SHARD worklets. The approved keywords and domains are dealt
+    round-robin so every shard gets its own themes.
+    """
+    count = state.count or 0
+    shards = max(1, math.ceil(count / WORKLETS_PER_SHARD)) if sharded else 1
+    if shards == 1:
+        return [(count, None)]
+
+    themes = []
+    if state.keywords_domains:
+        for term in state.keywords_domains.keywords + state.keywords_domains.domains:
+            if term not in themes:
+                themes.append(term)
+
+    plan = []
+    for i in range(shards):
+        shard_count = count // shards + (1 if i < count % shards else 0)
+        seed_themes = themes[i::shards]
+        if not seed_themes and themes:
+            seed_themes = [themes[i % len(themes)]]
+        plan.append((shard_count, seed_themes or None))
+    return plan
+
+
+def title_key(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", (title or "").lower()).strip()
+
+
+def is_duplicate_title(title: str, others, similarity: float = 0.9) -> bool:
+    """Whether the title matches (or nearly matches) any of the normalized titles in others."""
+    key = title_key(title)
+    return any(
+        key == other or SequenceMatcher(None, key, other).ratio() >= similarity
+        for other in others
+    )
+
+
+def dedupe_worklets(worklets: list, similarity: float = 0.9) -> list:
+    """Return the indices of worklets to keep, dropping (near-)duplicate titles."""
+    kept, keys = [], []
+    for index, worklet in enumerate(worklets):
+        if is_duplicate_title(worklet.title, keys, similarity):
+            print(f"Dropping duplicate worklet: {worklet.title}")
+            continue
+        kept.append(index)
+        keys.append(title_key(worklet.title))
+    return kept
+
+
 def build_search_queries_prompt(state: AgentState) -> list:
-    modified_state: AgentState = compress_main_prompt(
-        state.model_copy(),
+    modified_state: AgentState = get_compressed_context(
+        state,
         max_tokens=MAX_TOKENS,
         prompt_offset=900,
-        pass_limit=10,
         verbose=True,
     )
 
@@ -123,11 +185,10 @@ def build_search_queries_prompt(state: AgentState) -> list:
 
 def build_extraction_prompt(state: AgentState) -> list:
 
-    modified_state: AgentState = compress_main_prompt(
-        state.model_copy(),
+    modified_state: AgentState = get_compressed_context(
+        state,
         max_tokens=MAX_TOKENS,
         prompt_offset=600,
-        pass_limit=10,
         verbose=False,
     )
     worklet_data = (
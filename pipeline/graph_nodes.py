@@ -8,6 +8,10 @@ from pipeline.graph_helpers import (
     build_search_queries_prompt,
     parallel_search,
     build_reference_ranking_prompt,
+    dedupe_worklets,
+    is_duplicate_title,
+    plan_worklet_shards,
+    title_key,
 )
 from pipeline.state import AgentState
 from core.models.worklet import SimpleDomainsKeywords
@@ -23,7 +27,9 @@ from core.llm.outputs import (
     ReferenceKeywordResult,
     ReferenceSortingResult,
     Sources,
+    Worklet as GeneratedWorklet,
 )
+from core.llm.streaming import JsonStreamHandler
 from core.references.generate_references import generate_references
 from core.constants import SWITCHES
 from core.constants import (
@@ -31,8 +37,6 @@ from core.constants import (
     WORKLET_GENERATOR_LLM,
     REFERENCE_KEYWORD_LLM,
     REFERENCE_RANKING_LLM,
-    REFERENCE_KEYWORD_LLM2,
-    REFERENCE_RANKING_LLM2,
 )
 from core.services.upload_files import upload_files
 from core.parsers.process_files import process_files
@@ -119,6 +123,7 @@ async def extract_keywords_domains(state: AgentState) -> AgentState:
             response_schema=KeywordsExtractionResult,
             contents=prompt,
             port=KEYWORD_DOMAIN_EXTRACTION_LLM.port,
+            thread_id=state.thread_id,
         )
 
     else:
@@ -164,6 +169,7 @@ async def generate_web_search_queries(state: AgentState) -> AgentState:
         response_schema=WebSearchQueryResult,
         contents=prompt,
         port=WORKLET_GENERATOR_LLM.port,
+        thread_id=state.thread_id,
     )
 
     # Clean queries while preserving order
@@ -179,21 +185,142 @@ async def generate_web_search_queries(state: AgentState) -> AgentState:
 
 async def generate_worklets(state: AgentState) -> AgentState:
     s = time.time()
-    prompt = build_main_prompt(state)
+    shards = plan_worklet_shards(state, sharded=SWITCHES["SHARD_WORKLET_GENERATION"])
+    sharded = len(shards) > 1
 
     await update_message(
         {"message": "Generating worklets..."}, topic=f"{state.thread_id}/status_update"
     )
 
-    result: WorkletGenerationResult = await invoke_llm(
-        gpu_model=WORKLET_GENERATOR_LLM.model,
-        response_schema=WorkletGenerationResult,
-        contents=prompt,
-        port=WORKLET_GENERATOR_LLM.port,
+    pipelined = SWITCHES["STREAM_WORKLET_PIPELINE"]
+    # (shard, index) -> (streamed worklet, task carrying it through references and ranking)
+    pipeline_tasks: dict[tuple[int, int], tuple[GeneratedWorklet, asyncio.Task]] = {}
+    cancelled: list[asyncio.Task] = []
+    # (shard, index) -> normalized title of streamed worklets that are not duplicates
+    accepted: dict[tuple[int, int], str] = {}
+
+    def start_pipeline(key: tuple[int, int], worklet: GeneratedWorklet):
+        previous = pipeline_tasks.get(key)
+        if previous and previous[0] == worklet:
+            return
+        if previous:
+            # A retried generation produced a different worklet at this index
+            previous[1].cancel()
+            cancelled.append(previous[1])
+        pipeline_tasks[key] = (
+            worklet,
+            asyncio.create_task(pipeline_worklet(state, worklet)),
+        )
+
+    async def generate_shard(shard: int, count: int, seed_themes) -> list:
+        async def on_worklet(worklet: GeneratedWorklet, index: int):
+            key = (shard, index)
+            # A retry streams the same index again, count it once
+            accepted.pop(key, None)
+            if sharded and is_duplicate_title(worklet.title, accepted.values()):
+                return
+            accepted[key] = title_key(worklet.title)
+            await update_message(
+                {
+                    "message": f"Generated worklet {min(len(accepted), state.count)}/{state.count}: {worklet.title}"
+                },
+                topic=f"{state.thread_id}/status_update",
+            )
+            if pipelined:
+                start_pipeline(key, worklet)
+
+        result: WorkletGenerationResult = await invoke_llm(
+            gpu_model=WORKLET_GENERATOR_LLM.model,
+            response_schema=WorkletGenerationResult,
+            contents=build_main_prompt(state, count=count, seed_themes=seed_themes),
+            port=WORKLET_GENERATOR_LLM.port,
+            thread_id=state.thread_id,
+            stream_handler=JsonStreamHandler(
+                topic=f"{state.thread_id}/worklet_stream",
+                item_schema=GeneratedWorklet,
+                on_item=on_worklet,
+                stream_id=shard if sharded else None,
+            ),
+        )
+        return result.worklets
+
+    candidates = []  # (key, worklet) in shard order
+
+    async def run_shards(plan: list, first_shard: int) -> list:
+        """Run the planned shards concurrently and return the themes of failed ones."""
+        # The router spreads concurrent shards over the GPU backends
+        results = await asyncio.gather(
+            *(
+                generate_shard(first_shard + i, count, seed_themes)
+                for i, (count, seed_themes) in enumerate(plan)
+            ),
+            return_exceptions=True,
+        )
+        failures = [r for r in results if isinstance(r, BaseException)]
+        if len(failures) == len(results) and not candidates:
+            raise failures[0]
+
+        failed_themes = []
+        for i, shard_result in enumerate(results):
+            shard = first_shard + i
+            if isinstance(shard_result, BaseException):
+                print(f"Worklet generation shard {shard + 1} failed: {shard_result}")
+                failed_themes.extend(plan[i][1] or [])
+                continue
+            candidates.extend(((shard, j), w) for j, w in enumerate(shard_result))
+        return failed_themes
+
+    try:
+        failed_themes = await run_shards(shards, 0)
+        if sharded:
+            keep = dedupe_worklets([w for _, w in candidates])
+            candidates = [candidates[i] for i in keep]
+            shortfall = (state.count or 0) - len(candidates)
+            if shortfall > 0:
+                # One extra shard for what failed shards or duplicates left missing
+                print(f"Requesting {shortfall} more worklet(s) in a top-up shard")
+                await run_shards([(shortfall, failed_themes or None)], len(shards))
+                keep = dedupe_worklets([w for _, w in candidates])
+                candidates = [candidates[i] for i in keep]
+            candidates = candidates[: state.count]
+    except BaseException:
+        for _, task in pipeline_tasks.values():
+            task.cancel()
+            cancelled.append(task)
+        await asyncio.gather(*cancelled, return_exceptions=True)
+        raise
+
+    state.generation_output = WorkletGenerationResult(
+        worklets=[w for _, w in candidates]
+    )
+    print(
+        f"Worklet generation ({len(shards)} shard(s), {len(candidates)} worklets) "
+        f"took {time.time() - s:.2f} seconds"
     )
 
-    state.generation_output = result
-    print(f"Worklet generation took {time.time() - s:.2f} seconds")
+    if pipelined:
+        # Reconcile with the final parse: start anything the stream missed and
+        # drop tasks for items that were not kept.
+        for key, worklet in candidates:
+            start_pipeline(key, worklet)
+        kept_keys = set(key for key, _ in candidates)
+        for key in [k for k in pipeline_tasks if k not in kept_keys]:
+            task = pipeline_tasks.pop(key)[1]
+            task.cancel()
+            cancelled.append(task)
+        await asyncio.gather(*cancelled, return_exceptions=True)
+
+        async def with_files(task: asyncio.Task) -> Worklet:
+            # Files are only written for worklets that made the final list
+            worklet = await task
+            await generate_file(worklet=worklet, thread_id=state.thread_id)
+            return worklet
+
+        state.worklets = await asyncio.gather(
+            *(with_files(pipeline_tasks[key][1]) for key, _ in candidates)
+        )
+        state.pipelined = True
+        print(f"Streamed worklet pipeline took {time.time() - s:.2f} seconds")
     return state
 
 
@@ -232,57 +359,100 @@ async def web_search(state: AgentState) -> AgentState:
     return state
 
 
-async def references(state: AgentState) -> AgentState:
-    if not state.generation_output or not state.generation_output.worklets:
-        return state
+async def reference_worklet(state: AgentState, worklet) -> Worklet:
+    """Process a single worklet with reference keyword generation and fetching"""
+    await update_message(
+        {"message": f"Generating references for worklet: {worklet.title}..."},
+        topic=f"{state.thread_id}/status_update",
+    )
+    default_keywords = ReferenceKeywordResult(
+        google_scholar_keyword=worklet.title, github_keyword=worklet.title
+    )
 
-    s = time.time()
+    if SWITCHES["GENERATE_KEYWORD"]:
+        prompt = keyword_prompt(worklet.title or worklet.problem_statement)
+        try:
+            result: ReferenceKeywordResult = await invoke_llm(
+                gpu_model=REFERENCE_KEYWORD_LLM.model,
+                contents=prompt,
+                response_schema=ReferenceKeywordResult,
+                port=REFERENCE_KEYWORD_LLM.port,
+                thread_id=state.thread_id,
+            )
+            keywords = result or default_keywords
+
+        except Exception as e:
+            print(
+                f"Error extracting reference keyword for worklet '{worklet.title}': {e}"
+            )
+            keywords = default_keywords
+    else:
+        keywords = default_keywords
+
+    references = await generate_references(keywords)
+
+    return Worklet(
+        **worklet.model_dump(),
+        references=references,
+        worklet_id=str(time.time()),
+    )
 
-    async def process_single_worklet(worklet, llm_config):
-        """Process a single worklet with reference keyword generation and fetching"""
+
+async def rank_worklet(state: AgentState, worklet: Worklet) -> Worklet:
+    """Rank references for a single worklet"""
+    try:
         await update_message(
-            {"message": f"Generating references for worklet: {worklet.title}..."},
+            {"message": f"Ranking references for worklet: {worklet.title}..."},
             topic=f"{state.thread_id}/status_update",
         )
-        default_keywords = ReferenceKeywordResult(
-            google_scholar_keyword=worklet.title, github_keyword=worklet.title
+        if not worklet.references or len(worklet.references) == 0:
+            return worklet
+
+        prompt = build_reference_ranking_prompt(worklet)
+
+        result: ReferenceSortingResult = await invoke_llm(
+            gpu_model=REFERENCE_RANKING_LLM.model,
+            response_schema=ReferenceSortingResult,
+            contents=prompt,
+            port=REFERENCE_RANKING_LLM.port,
+            thread_id=state.thread_id,
         )
 
-        if SWITCHES["GENERATE_KEYWORD"]:
-            prompt = keyword_prompt(worklet.title or worklet.problem_statement)
-            try:
-                result: ReferenceKeywordResult = await invoke_llm(
-                    gpu_model=llm_config.model,
-                    contents=prompt,
-                    response_schema=ReferenceKeywordResult,
-                    port=llm_config.port,
-                )
-                keywords = result or default_keywords
+        sorted_indices = result.sorted_indices
+        sorted_references = [
+            worklet.references[i] for i in sorted_indices if i < len(worklet.references)
+        ]
+        worklet.references = sorted_references
+        worklet = fix_dashes(worklet)
+        print(f"Ranked references for worklet '{worklet.title}': {sorted_indices}")
+        return worklet
+    except Exception as e:
+        print(f"Error ranking references for worklet '{worklet.title}': {e}")
+        # Return worklet unchanged if ranking fails
+        return worklet
 
-            except Exception as e:
-                print(
-                    f"Error extracting reference keyword for worklet '{worklet.title}': {e}"
-                )
-                keywords = default_keywords
-        else:
-            keywords = default_keywords
 
-        references = await generate_references(keywords)
+async def pipeline_worklet(state: AgentState, generated) -> Worklet:
+    """
+    Streaming mode: carry one freshly generated worklet through references
+    and ranking without waiting for the other worklets. Its files are
+    generated once generation has finished and the worklet was kept.
+    """
+    worklet = await reference_worklet(state, generated)
+    if SWITCHES["RANK_REFERENCES"]:
+        worklet = await rank_worklet(state, worklet)
+    return worklet
 
-        return Worklet(
-            **worklet.model_dump(),
-            references=references,
-            worklet_id=str(time.time()),
-        )
 
-    # Parallelize worklet processing, alternating between the two LLM configs
-    worklets = state.generation_output.worklets
-    tasks = []
+async def references(state: AgentState) -> AgentState:
+    if not state.generation_output or not state.generation_output.worklets:
+        return state
+
+    s = time.time()
 
-    for idx, worklet in enumerate(worklets):
-        # Alternate between LLM1 and LLM2 to keep both ports busy
-        llm_config = REFERENCE_KEYWORD_LLM if idx % 2 == 0 else REFERENCE_KEYWORD_LLM2
-        tasks.append(process_single_worklet(worklet, llm_config))
+    # Parallelize worklet processing
+    worklets = state.generation_output.worklets
+    tasks = [reference_worklet(state, worklet) for worklet in worklets]
 
     # Process all worklets in parallel
     state.worklets = await asyncio.gather(*tasks)
@@ -297,49 +467,9 @@ async def rank_references(state: AgentState) -> AgentState:
 
     s = time.time()
 
-    async def rank_single_worklet(worklet, llm_config):
-        """Rank references for a single worklet"""
-        try:
-            await update_message(
-                {"message": f"Ranking references for worklet: {worklet.title}..."},
-                topic=f"{state.thread_id}/status_update",
-            )
-            if not worklet.references or len(worklet.references) == 0:
-                return worklet
-
-            prompt = build_reference_ranking_prompt(worklet)
-
-            result: ReferenceSortingResult = await invoke_llm(
-                gpu_model=llm_config.model,
-                response_schema=ReferenceSortingResult,
-                contents=prompt,
-                port=llm_config.port,
-            )
-
-            sorted_indices = result.sorted_indices
-            sorted_references = [
-                worklet.references[i]
-                for i in sorted_indices
-                if i < len(worklet.references)
-            ]
-            worklet.references = sorted_references
-            worklet = fix_dashes(worklet)
-            print(f"Ranked references for worklet '{worklet.title}': {sorted_indices}")
-            return worklet
-        except Exception as e:
-            print(f"Error ranking references for worklet '{worklet.title}': {e}")
-            # Return worklet unchanged if ranking fails
-            return worklet
-
     try:
-        # Parallelize ranking, alternating between the two ranking LLM configs
-        tasks = []
-        for idx, worklet in enumerate(state.worklets):
-            # Alternate between RANKING_LLM1 and RANKING_LLM2 to keep both ports busy
-            llm_config = (
-                REFERENCE_RANKING_LLM if idx % 2 == 0 else REFERENCE_RANKING_LLM2
-            )
-            tasks.append(rank_single_worklet(worklet, llm_config))
+        # Parallelize ranking
+        tasks = [rank_worklet(state, worklet) for worklet in state.worklets]
 
         # Process all rankings in parallel
         state.worklets = await asyncio.gather(*tasks)
@@ -368,10 +498,12 @@ async def generate_files(state: AgentState) -> AgentState:
         },
     )
 
-    s = time.time()
-    for idx, worklet in enumerate(state.worklets):
-        await generate_file(worklet=worklet, thread_id=state.thread_id)
+    # In streaming mode every worklet's files were generated as soon as it was ready
+    if not state.pipelined:
+        s = time.time()
+        for idx, worklet in enumerate(state.worklets):
+            await generate_file(worklet=worklet, thread_id=state.thread_id)
 
-    print(f"{idx + 1} File generation took {time.time() - s:.2f} seconds")
+        print(f"{idx + 1} File generation took {time.time() - s:.2f} seconds")
     db.threads.update_one({"thread_id": state.thread_id}, {"$set": {"generated": True}})
     return state
@@ -23,3 +23,4 @@ class AgentState(BaseModel):
     web_search: Optional[bool] = False
     web_search_results: Optional[Union[Dict, List]] = Field(default_factory=list)
     worklets: Optional[List[Worklet]] = Field(default_factory=list)
+    pipelined: Optional[bool] = False
@@ -1,31 +1,146 @@
-import json
 from dotenv import load_dotenv
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient
+from collections import OrderedDict
+import httpx
 import os
 import asyncio
+import random
 import time
 
 load_dotenv()
 tavily_api_key = os.getenv("TAVILY_API_KEY")
 
 # Initialize Tavily client
-client = TavilyClient(api_key=tavily_api_key)
+client = AsyncTavilyClient(api_key=tavily_api_key)
+
+MAX_CONCURRENT_EXTRACTS = 4
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 1.0  # Seconds, doubled per attempt plus jitter
+URL_TIMEOUT = 90.0  # Per URL, including retries
+VALIDATOR_TIMEOUT = 5.0
+# Content whose ETag/Last-Modified still matches is reused for this long,
+# content without validators only for NO_VALIDATOR_TTL
+VALIDATED_TTL = 7 * 24 * 3600
+NO_VALIDATOR_TTL = 3600
+CACHE_SIZE = 256
+
+_extract_slots = asyncio.Semaphore(MAX_CONCURRENT_EXTRACTS)
+# url -> (validator, fetched_at, result)
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_http_client: httpx.AsyncClient | None = None
+stats = {"extracted": 0, "cached": 0, "failed": 0}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            follow_redirects=True, timeout=httpx.Timeout(VALIDATOR_TIMEOUT)
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def get_validator(url: str) -> str | None:
+    """ETag or Last-Modified of the URL, None if the server sends neither."""
+    try:
+        response = await get_http_client().head(url)
+    except Exception as e:
+        # Malformed URLs raise httpx.InvalidURL, which is not an HTTPError
+        print(f"Validator lookup failed for {url}: {e}")
+        return None
+    if response.status_code >= 400:
+        return None
+    return response.headers.get("ETag") or response.headers.get("Last-Modified")
+
+
+async def _cached(url: str):
+    """
+    Cached content for the URL if it is still current. Only URLs with a cache
+    entry are revalidated, and only when that entry has a validator.
+    """
+    entry = _cache.get(url)
+    if entry is None:
+        return None
+    cached_validator, fetched_at, result = entry
+    age = time.time() - fetched_at
+    if not cached_validator:
+        return result if age <= NO_VALIDATOR_TTL else None
+    if age > VALIDATED_TTL:
+        return None
+    return result if await get_validator(url) == cached_validator else None
+
+
+async def _extract_one(url: str, depth: str) -> dict | None:
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            async with _extract_slots:
+                response = await client.extract(urls=[url], extract_depth=depth)
+            results = response.get("results") or []
+            if results:
+                return results[0]
+            failed = response.get("failed_results") or []
+            print(f"Tavily extract attempt {attempt} failed for {url}: {failed}")
+        except Exception as e:
+            print(f"Tavily extract attempt {attempt} failed for {url}: {e}")
+        if attempt < MAX_ATTEMPTS:
+            delay = BACKOFF_BASE * 2 ** (attempt - 1)
+            await asyncio.sleep(delay + random.uniform(0, delay))
+    return None
+
+
+async def extract_link(url: str, depth: str = "advanced") -> dict | None:
+    """Extract one URL, reusing cached content while its validator is unchanged."""
+    result = await _cached(url)
+    if result is not None:
+        stats["cached"] += 1
+        if url in _cache:
+            _cache.move_to_end(url)
+        return dict(result)
+
+    # The validator is only needed to revalidate next time, fetch it alongside
+    validator_task = asyncio.create_task(get_validator(url))
+    try:
+        result = await _extract_one(url, depth)
+    except BaseException:
+        validator_task.cancel()
+        raise
+    validator = await validator_task
+    if result is None:
+        stats["failed"] += 1
+        return None
+    stats["extracted"] += 1
+    _cache[url] = (validator, time.time(), result)
+    _cache.move_to_end(url)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return dict(result)
 
 
 async def extract_links(urls: list[str], depth: str = "advanced") -> list[dict]:
-    attempts = 0
-    while attempts < 5:
+    """
+    Extract every URL independently with bounded parallelism. URLs that fail or
+    time out are skipped, so the rest of the links still reach the prompt.
+    """
+    urls = list(dict.fromkeys(urls))
+
+    async def extract_with_timeout(url: str):
         try:
-            results = await asyncio.to_thread(
-                client.extract,
-                urls=urls,
-                extract_depth=depth,
-            )
-            
-            return results["results"]
+            return await asyncio.wait_for(extract_link(url, depth), URL_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"Tavily extract timed out for {url}")
+            stats["failed"] += 1
+            return None
         except Exception as e:
-            attempts += 1
-            print(f"Tavily search attempt {attempts} failed: {e}")
-            if attempts >= 5:
-                return []
-            await asyncio.sleep(1)
+            print(f"Tavily extract failed for {url}: {e}")
+            stats["failed"] += 1
+            return None
+
+    results = await asyncio.gather(*(extract_with_timeout(url) for url in urls))
+    return [r for r in results if r]
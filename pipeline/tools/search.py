@@ -1,20 +1,116 @@
 from dotenv import load_dotenv
-from tavily import TavilyClient
+from tavily import (
+    AsyncTavilyClient,
+    InvalidAPIKeyError,
+    MissingAPIKeyError,
+    UsageLimitExceededError,
+)
+from collections import OrderedDict
 import os
 import asyncio
+import random
 import time
 
 load_dotenv()
 tavily_api_key = os.getenv("TAVILY_API_KEY")
 
 # Initialize Tavily client
-client = TavilyClient(api_key=tavily_api_key)
+client = AsyncTavilyClient(api_key=tavily_api_key)
+
+MAX_CONCURRENT_SEARCHES = 4  # Tavily calls in flight across all threads
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 0.5  # Seconds, doubled per attempt plus jitter
+RESULT_TTL = 3600  # Seconds a search result is reused for
+RESULT_CACHE_SIZE = 512
+# Failures that retrying cannot fix
+FATAL_ERRORS = (InvalidAPIKeyError, MissingAPIKeyError, UsageLimitExceededError)
+# Shared by web_search and the Scholar-empty fallback in generate_references,
+# so a query either of them already searched is served from the result cache
+WEB_SEARCH_OPTIONS = {
+    "max_results": 4,
+    "depth": "advanced",
+    "include_answer": True,
+    "include_favicon": False,
+}
+
+_search_slots = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+# (query, depth, max_results, include_answer, include_favicon) -> (created_at, response)
+_results: "OrderedDict[tuple, tuple]" = OrderedDict()
+_in_flight: dict[tuple, asyncio.Task] = {}
+stats = {"requests": 0, "reused": 0, "retries": 0, "failures": 0}
+
+
+def _find_reusable(key: tuple):
+    """A cached response for the exact same search, if still fresh."""
+    entry = _results.get(key)
+    if entry is None or time.time() - entry[0] > RESULT_TTL:
+        return None
+    _results.move_to_end(key)
+    return _copy(entry[1])
+
+
+def _copy(response: dict) -> dict:
+    # Callers strip keys from the results, hand each one its own copy
+    if not response:
+        return {}
+    return {**response, "results": [dict(r) for r in (response.get("results") or [])]}
+
+
+def _remember(key: tuple, response: dict) -> None:
+    _results[key] = (time.time(), response)
+    _results.move_to_end(key)
+    while len(_results) > RESULT_CACHE_SIZE:
+        _results.popitem(last=False)
+
+
+async def _search_with_retries(
+    query: str, max_results: int, depth: str, include_answer: bool, include_favicon: bool
+) -> dict:
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            async with _search_slots:
+                stats["requests"] += 1
+                return await client.search(
+                    query=query,
+                    include_answer="advanced" if include_answer else None,
+                    search_depth=depth,
+                    max_results=max_results,
+                    include_favicon=True if include_favicon else False,
+                )
+        except FATAL_ERRORS as e:
+            print(f"Tavily search failed permanently: {e}")
+            break
+        except Exception as e:
+            print(f"Tavily search attempt {attempt} failed: {e}")
+            if attempt >= MAX_ATTEMPTS:
+                break
+            stats["retries"] += 1
+            delay = BACKOFF_BASE * 2 ** (attempt - 1)
+            await asyncio.sleep(delay + random.uniform(0, delay))
+    stats["failures"] += 1
+    return {}
+
+
+async def _search_and_remember(
+    key: tuple, query: str, max_results: int, depth: str, include_answer: bool, include_favicon: bool
+) -> dict:
+    response = await _search_with_retries(
+        query, max_results, depth, include_answer, include_favicon
+    )
+    if response:
+        _remember(key, response)
+    return response
 
 
 async def search_tavily(query: str, max_results: int = 4, depth: str = "advanced", include_answer: bool = True, include_favicon: bool = True):
     """
     Perform an asynchronous web search using Tavily API with retry logic.
 
+    Searches share a bounded pool of Tavily calls and retry with exponential
+    backoff and jitter. A response is reused (within RESULT_TTL) for a later
+    identical search, and identical searches in flight at the same time share
+    one call.
+
     Args:
         query (str): The search query string.
         max_results (int): Maximum number of results to return (default=5).
@@ -25,20 +121,46 @@ async def search_tavily(query: str, max_results: int = 4, depth: str = "advanced
     Returns:
         dict: Tavily API response containing search results, or empty dict on failure.
     """
-    attempts = 0
-    while attempts < 5:
-        try:
-            return await asyncio.to_thread(
-                client.search,
-                query=query,
-                include_answer="advanced" if include_answer else None,
-                search_depth=depth,
-                max_results=max_results,
-                include_favicon=True if include_favicon else False,
+    key = (
+        " ".join(query.lower().split()),
+        depth,
+        max_results,
+        include_answer,
+        include_favicon,
+    )
+    reusable = _find_reusable(key)
+    if reusable is not None:
+        stats["reused"] += 1
+        return reusable
+
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            _search_and_remember(
+                key, query, max_results, depth, include_answer, include_favicon
             )
-        except Exception as e:
-            attempts += 1
-            print(f"Tavily search attempt {attempts} failed: {e}")
-            if attempts >= 5:
-                return {}
-            await asyncio.sleep(1)
+        )
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    else:
+        stats["reused"] += 1
+
+    # Shielded so one cancelled caller does not fail the others sharing the call
+    return _copy(await asyncio.shield(task))
+
+
+def dedupe_results(search_results: list) -> list:
+    """Drop results whose URL already appeared for an earlier query."""
+    seen = set()
+    for res in search_results:
+        if not res:
+            continue
+        unique = []
+        for r in res.get("results") or []:
+            url = (r.get("url") or "").split("#")[0].rstrip("/")
+            if url and url in seen:
+                continue
+            seen.add(url)
+            unique.append(r)
+        res["results"] = unique
+    return search_results
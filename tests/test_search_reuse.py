@@ -0,0 +1,43 @@
+import unittest
+
+from core.references.generate_references import fetch_web_references
+from pipeline.graph_helpers import parallel_search
+from pipeline.tools import search
+
+
+class FakeTavilyClient:
+    def __init__(self):
+        self.calls = []
+
+    async def search(self, query, **options):
+        self.calls.append((query, options))
+        return {
+            "query": query,
+            "answer": "answer",
+            "results": [
+                {"title": "Result", "url": "https://example.com/a", "content": "text"}
+            ],
+        }
+
+
+class SearchReuseTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.original_client = search.client
+        search.client = FakeTavilyClient()
+        search._results.clear()
+        search._in_flight.clear()
+
+    def tearDown(self):
+        search.client = self.original_client
+        search._results.clear()
+
+    async def test_scholar_fallback_reuses_web_search_results(self):
+        await parallel_search(["Edge AI  for drones"])
+        references = await fetch_web_references("edge ai for drones")
+
+        self.assertEqual(len(search.client.calls), 1)
+        self.assertEqual([r.link for r in references], ["https://example.com/a"])
+
+
+if __name__ == "__main__":
+    unittest.main()